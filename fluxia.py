@@ -1,28 +1,161 @@
 # fluxia.py
 
+import time
+_t_start = time.perf_counter()
+
 import sys
-from fluxia_lexer import lex
-from fluxia_parser import Parser, ParserError
-from fluxia_compiler import Compiler, CompilerError
-from fluxia_vm import FluxiaVM, VMError
+from fluxia_build import ProjectBuilder
+from fluxia_output import OutputSink, DEFAULT_BUFFER_SIZE
+from fluxia_backends import BACKENDS, load_backend
 
-def run_fluxia_file(path: str):
-    with open(path, "r", encoding="utf-8") as f:
-        code = f.read()
+# Le lexer, le parser et le compilateur ne sont importés que si un module
+# doit être recompilé (voir fluxia_build.compile_source).
 
+def run_fluxia_file(path: str, output: OutputSink = None, backend: str = "vm",
+                    jobs: int = None, use_cache: bool = True, startup_timing: bool = False,
+                    profile: str = None, profile_interval: float = None,
+                    metrics_port: int = None, metrics_dump: str = None):
+    if output is None:
+        output = OutputSink()
+    t_imports = time.perf_counter()
+    t_build = t_init = t_run = None
+    builder = ProjectBuilder(jobs=jobs, use_cache=use_cache)
+    vm = sampler = server = None
     try:
-        tokens = lex(code)
-        parser = Parser(tokens)
-        program = parser.parse()
-        compiler = Compiler()
-        functions, uses = compiler.compile(program)
-        vm = FluxiaVM(functions, uses)
+        if path.endswith(".fxb"):
+            # Bytecode packé (fluxia_bytecode) : projeté en mémoire, pas de build
+            from fluxia_bytecode import load_packed
+            functions, uses = load_packed(path)
+        else:
+            functions, uses = builder.build(path)
+        t_build = time.perf_counter()
+        vm = load_backend(backend)(functions, uses, output=output)
+        t_init = time.perf_counter()
+        if profile or metrics_port is not None or metrics_dump:
+            sampler, server = start_observers(vm, profile, profile_interval, metrics_port)
         vm.run()
-    except (ParserError, CompilerError, VMError, Exception) as e:
-        print("Error:", e)
+        t_run = time.perf_counter()
+    except Exception as e:
+        output.write_print(("Error:", e))
+    finally:
+        output.flush()
+        if sampler is not None:
+            stop_observers(vm, sampler, server, profile, metrics_dump)
+    if startup_timing:
+        report_startup(t_imports, t_build, t_init, t_run, builder)
+
+def start_observers(vm, profile: str, profile_interval: float, metrics_port: int):
+    """Démarre le sampler et, si demandé, le serveur de métriques local."""
+    from fluxia_metrics import Sampler, MetricsServer, DEFAULT_INTERVAL
+
+    sampler = Sampler(vm, interval=profile_interval or DEFAULT_INTERVAL).start()
+    server = None
+    if metrics_port is not None:
+        server = MetricsServer(vm, sampler, port=metrics_port).start()
+        host, port = server.address[:2]
+        print(f"[metrics] http://{host}:{port}/metrics", file=sys.stderr)
+    return sampler, server
+
+def stop_observers(vm, sampler, server, profile: str, metrics_dump: str):
+    from fluxia_metrics import collect_metrics, to_json, to_prometheus
+
+    sampler.stop()
+    if server is not None:
+        server.stop()
+    if profile:
+        sampler.write_collapsed(profile)
+        print(f"[profile] {sampler.total} samples -> {profile}", file=sys.stderr)
+    if metrics_dump:
+        metrics = collect_metrics(vm, sampler)
+        print(to_json(metrics) if metrics_dump == "json" else to_prometheus(metrics), end="", file=sys.stderr)
+
+def watch_fluxia_file(path: str, output: OutputSink, backend: str = "vm", interval: float = 0.5):
+    """Boucle de rechargement : à chaque modification du fichier, seules les
+    fonctions modifiées sont recompilées, puis le programme est relancé dans
+    la même VM (les globals sont conservés)."""
+    import os
+    from fluxia_incremental import IncrementalSession
+
+    session = IncrementalSession(load_backend(backend), output)
+    mtime = None
+    while True:
+        try:
+            current = os.stat(path).st_mtime_ns
+        except OSError:
+            current = None
+        if current is not None and current != mtime:
+            mtime = current
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    changed = session.update(f.read())
+                print(f"[watch] recompiled: {', '.join(changed) or '-'}", file=sys.stderr)
+                session.vm.run()
+            except Exception as e:
+                output.write_print(("Error:", e))
+            finally:
+                output.flush()
+        time.sleep(interval)
+
+def report_startup(t_imports, t_build, t_init, t_run, builder: ProjectBuilder):
+    """Affiche sur stderr le temps passé dans chaque phase."""
+    def ms(a, b):
+        return f"{(b - a) * 1000:.2f} ms" if a is not None and b is not None else "-"
+    print(f"[startup] imports+cli {ms(_t_start, t_imports)}", file=sys.stderr)
+    print(f"[startup] build       {ms(t_imports, t_build)}"
+          f" ({len(builder.compiled)} compiled, {len(builder.reused)} from cache)", file=sys.stderr)
+    print(f"[startup] vm init     {ms(t_build, t_init)}", file=sys.stderr)
+    print(f"[startup] run         {ms(t_init, t_run)}", file=sys.stderr)
+    print(f"[startup] total       {ms(_t_start, time.perf_counter())}", file=sys.stderr)
+
+def make_arg_parser():
+    import argparse
+    ap = argparse.ArgumentParser(prog="fluxia.py", description="Exécute un fichier Fluxia.")
+    ap.add_argument("file", help="fichier .fx (ou bytecode .fxb) à exécuter")
+    ap.add_argument("--backend", choices=sorted(BACKENDS), default="vm",
+                    help="backend d'exécution (défaut : %(default)s)")
+    ap.add_argument("--jobs", type=int, default=None, metavar="N",
+                    help="processus utilisés pour compiler les modules (défaut : nombre de CPU)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="ignore et n'écrit pas le bytecode en cache (__fluxiacache__/)")
+    ap.add_argument("--watch", action="store_true",
+                    help="relance le fichier à chaque modification (recompilation incrémentale)")
+    ap.add_argument("--startup-timing", action="store_true",
+                    help="affiche sur stderr le temps de chaque phase de démarrage")
+    ap.add_argument("--profile", metavar="FILE",
+                    help="profilage par échantillonnage ; écrit les piles repliées (flamegraph) dans FILE")
+    ap.add_argument("--profile-interval", type=float, default=None, metavar="SECONDS",
+                    help="intervalle d'échantillonnage (défaut : 0.005)")
+    ap.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                    help="sert /metrics, /metrics.json et /profile sur 127.0.0.1:PORT pendant l'exécution")
+    ap.add_argument("--metrics-dump", choices=("prom", "json"), default=None,
+                    help="affiche les métriques sur stderr à la fin de l'exécution")
+    ap.add_argument("--buffer-size", type=int, default=None, metavar="BYTES",
+                    help=f"taille du tampon de sortie de print (défaut : {DEFAULT_BUFFER_SIZE}, "
+                         "0 si la sortie est un terminal)")
+    ap.add_argument("--flush-interval", type=float, default=None, metavar="SECONDS",
+                    help="vide la sortie si le dernier vidage date de plus de SECONDS")
+    ap.add_argument("--unbuffered", action="store_true",
+                    help="vide la sortie après chaque print")
+    return ap
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python fluxia.py <file.fx>")
-        sys.exit(1)
-    run_fluxia_file(sys.argv[1])
+    args = make_arg_parser().parse_args()
+    buffer_size = args.buffer_size
+    if args.unbuffered:
+        buffer_size = 0
+    elif buffer_size is None:
+        # Terminal : chaque print s'affiche aussitôt, comme le print de Python.
+        # Le tampon ne sert que pour les tubes et les fichiers.
+        buffer_size = 0 if sys.stdout.isatty() else DEFAULT_BUFFER_SIZE
+    output = OutputSink(buffer_size=buffer_size, flush_interval=args.flush_interval)
+    if args.watch:
+        try:
+            watch_fluxia_file(args.file, output, backend=args.backend)
+        except KeyboardInterrupt:
+            pass
+    else:
+        run_fluxia_file(args.file, output, backend=args.backend,
+                        jobs=args.jobs, use_cache=not args.no_cache,
+                        startup_timing=args.startup_timing,
+                        profile=args.profile, profile_interval=args.profile_interval,
+                        metrics_port=args.metrics_port, metrics_dump=args.metrics_dump)
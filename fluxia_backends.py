@@ -0,0 +1,23 @@
+# fluxia_backends.py
+"""
+Backends d'exécution de Fluxia.
+
+Registre partagé par la CLI (fluxia.py), fluxia_pool, fluxia_bench et
+fluxia_conformance. Le module n'importe rien au chargement : chaque backend
+est importé à son premier load_backend(), y compris dans les processus
+workers d'un ContextPool.
+"""
+
+import importlib
+
+# Nom -> (module, classe)
+BACKENDS = {
+    "vm": ("fluxia_vm", "FluxiaVM"),
+    "py": ("fluxia_pybackend", "PyBackendVM"),
+    "reg": ("fluxia_regvm", "RegisterVM"),
+}
+
+
+def load_backend(name: str):
+    module, cls = BACKENDS[name]
+    return getattr(importlib.import_module(module), cls)
@@ -0,0 +1,192 @@
+# fluxia_bench.py
+"""
+Benchmarks Fluxia : compare les backends d'exécution sur quelques programmes.
+
+Usage :
+    python fluxia_bench.py [--repeat N] [--backends vm,py] [bench ...]
+    python fluxia_bench.py --incremental
+    python fluxia_bench.py --memory [--size MB]
+
+Pour chaque programme et chaque backend, on mesure la préparation
+(construction de la VM, donc traduction pour les backends compilés) et
+l'exécution ; le meilleur temps sur N répétitions est retenu.
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+from typing import Dict, List, Tuple
+
+from fluxia_lexer import lex
+from fluxia_parser import Parser
+from fluxia_compiler import Compiler
+from fluxia_output import CaptureSink
+from fluxia_backends import BACKENDS, load_backend
+
+BENCHMARKS: Dict[str, str] = {
+    "fib": """
+fn fib(n) {
+    if (n < 2) { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+fn main() { return fib(20); }
+""",
+    "loop": """
+fn main() {
+    let i = 0;
+    let s = 0;
+    while (i < 200000) {
+        s = s + i * 2 - i / 4;
+        i = i + 1;
+    }
+    return s;
+}
+""",
+    "calls": """
+fn add(a, b) { return a + b; }
+fn step(x) {
+    if (x > 1000) { return x - 1000; }
+    return add(x, 3);
+}
+fn main() {
+    let i = 0;
+    let x = 0;
+    while (i < 50000) {
+        x = step(x);
+        i = i + 1;
+    }
+    return x;
+}
+""",
+    "print": """
+fn main() {
+    let i = 0;
+    while (i < 50000) {
+        print("line", i, i * 2);
+        i = i + 1;
+    }
+}
+""",
+}
+
+
+def compile_source(source: str):
+    program = Parser(lex(source)).parse()
+    return Compiler().compile(program)
+
+
+def time_backend(backend: str, source: str, repeat: int) -> Tuple[float, float, object]:
+    cls = load_backend(backend)
+    best_setup = best_run = float("inf")
+    result = None
+    for _ in range(repeat):
+        functions, uses = compile_source(source)
+        t0 = time.perf_counter()
+        vm = cls(functions, uses, output=CaptureSink())
+        t1 = time.perf_counter()
+        result = vm.run()
+        t2 = time.perf_counter()
+        best_setup = min(best_setup, t1 - t0)
+        best_run = min(best_run, t2 - t1)
+    return best_setup, best_run, result
+
+
+def generated_source(nfunctions: int, edited: int = -1) -> str:
+    lines = []
+    for i in range(nfunctions):
+        k = i + 1000 if i == edited else i
+        lines.append(f"fn f{i}(x) {{ let y = x * {k}; if (y > 10) {{ return y - 1; }} return y + f{max(i - 1, 0)}(1); }}")
+    lines.append("fn main() { return f0(3); }")
+    return "\n".join(lines)
+
+
+def bench_incremental(sizes=(100, 1000, 10000)):
+    """Latence d'une édition : recompilation complète vs IncrementalSession."""
+    from fluxia_incremental import IncrementalSession
+
+    print(f"{'functions':>10}{'full ms':>10}{'incr ms':>10}  recompiled")
+    for n in sizes:
+        source = generated_source(n)
+        edited = generated_source(n, edited=n // 2)
+        t0 = time.perf_counter()
+        compile_source(edited)
+        full = time.perf_counter() - t0
+
+        session = IncrementalSession(output=CaptureSink())
+        session.update(source)
+        t0 = time.perf_counter()
+        changed = session.update(edited)
+        incr = time.perf_counter() - t0
+        print(f"{n:>10}{full * 1000:>10.2f}{incr * 1000:>10.2f}  {', '.join(changed)}")
+
+
+def bench_memory(size_mb: float = 10.0):
+    """Mémoire des tokens, de l'AST et du bytecode pour une source générée."""
+    target = int(size_mb * 1024 * 1024)
+    nfunctions = 1000
+    source = generated_source(nfunctions)
+    while len(source) < target:
+        nfunctions = nfunctions * target // len(source) + 1
+        source = generated_source(nfunctions)
+    size = len(source)
+    mb = 1024 * 1024
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    base = tracemalloc.get_traced_memory()[0]
+    tokens = lex(source)
+    t1 = time.perf_counter()
+    tokens_mem = tracemalloc.get_traced_memory()[0] - base
+    program = Parser(tokens).parse()
+    t2 = time.perf_counter()
+    del tokens
+    ast_mem = tracemalloc.get_traced_memory()[0] - base
+    functions, _ = Compiler().compile(program)
+    t3 = time.perf_counter()
+    del program
+    code_mem = tracemalloc.get_traced_memory()[0] - base
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    print(f"source   {size / mb:8.1f} MB  {nfunctions} functions")
+    print(f"{'stage':<9}{'MB':>8}{'x src':>8}{'s':>8}")
+    for stage, mem, elapsed in (("tokens", tokens_mem, t1 - t0), ("ast", ast_mem, t2 - t1),
+                                ("bytecode", code_mem, t3 - t2), ("peak", peak, t3 - t0)):
+        print(f"{stage:<9}{mem / mb:>8.1f}{mem / size:>8.2f}{elapsed:>8.2f}")
+    return functions
+
+
+def main(argv: List[str] = None):
+    ap = argparse.ArgumentParser(description="Benchmarks des backends Fluxia.")
+    ap.add_argument("benchmarks", nargs="*", default=list(BENCHMARKS))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--backends", default=",".join(BACKENDS))
+    ap.add_argument("--incremental", action="store_true",
+                    help="mesure la latence d'édition de fluxia_incremental")
+    ap.add_argument("--memory", action="store_true",
+                    help="mesure la mémoire des tokens, de l'AST et du bytecode")
+    ap.add_argument("--size", type=float, default=10.0,
+                    help="taille de la source générée pour --memory (Mo)")
+    args = ap.parse_args(argv)
+    if args.memory:
+        bench_memory(args.size)
+        return
+    if args.incremental:
+        bench_incremental()
+        return
+    backends = args.backends.split(",")
+
+    print(f"{'bench':<10}{'backend':<9}{'setup ms':>10}{'run ms':>10}{'vs ' + backends[0]:>9}  result")
+    for bench in args.benchmarks:
+        reference = None
+        for backend in backends:
+            setup, run, result = time_backend(backend, BENCHMARKS[bench], args.repeat)
+            if reference is None:
+                reference = run
+            print(f"{bench:<10}{backend:<9}{setup * 1000:>10.2f}{run * 1000:>10.2f}"
+                  f"{reference / run:>8.2f}x  {result}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
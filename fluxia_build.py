@@ -0,0 +1,277 @@
+# fluxia_build.py
+"""
+Construction d'un projet Fluxia multi-fichiers.
+
+`use nom;` désigne le module nom.fx (ou nom.flx) situé dans le dossier du
+fichier qui l'utilise. Les modules natifs (NATIVE_MODULES) et les `use` qui
+ne correspondent à aucun fichier sont transmis tels quels à la VM.
+
+ProjectBuilder :
+- découvre les modules à partir du fichier d'entrée ;
+- lexe, parse et compile les modules indépendants en parallèle dans un
+  pool de processus ;
+- garde le bytecode de chaque module dans __fluxiacache__/, à côté des
+  sources (format marshal : pas d'import de pickle au démarrage) ;
+- ne recompile que les modules dont la source, ou la clé de build d'une
+  dépendance, a changé.
+
+Édition de liens : les fonctions de tous les modules partagent un seul
+espace de noms (un doublon est une BuildError). Le code de premier niveau
+de chaque module devient la fonction `__init__:<module>` ; le `__main__`
+du programme appelle ces fonctions, dépendances d'abord.
+"""
+
+import os
+import marshal
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+CACHE_DIR = "__fluxiacache__"
+CACHE_VERSION = 1
+MODULE_SUFFIXES = (".fx", ".flx")
+NATIVE_MODULES = ("gui",)
+
+# Sources dont dépend le bytecode produit : le cache est invalidé si elles changent
+COMPILER_SOURCES = ("fluxia_lexer.py", "fluxia_parser.py", "fluxia_compiler.py", "fluxia_intrinsics.py")
+
+Functions = Dict[str, Tuple[List[str], List[Tuple]]]
+
+
+class BuildError(Exception):
+    pass
+
+
+def resolve_module(name: str, base_dir: str) -> Optional[str]:
+    """Chemin du fichier du module `name`, ou None pour un module natif."""
+    if name in NATIVE_MODULES:
+        return None
+    for suffix in MODULE_SUFFIXES:
+        path = os.path.join(base_dir, name + suffix)
+        if os.path.isfile(path):
+            return os.path.abspath(path)
+    return None
+
+
+def compile_source(source: str) -> Tuple[Functions, List[str]]:
+    """Lex + parse + compile d'un module (exécuté dans les workers)."""
+    from fluxia_lexer import lex
+    from fluxia_parser import Parser
+    from fluxia_compiler import Compiler
+
+    program = Parser(lex(source)).parse()
+    return Compiler().compile(program)
+
+
+_fingerprint = None
+
+def compiler_fingerprint() -> str:
+    global _fingerprint
+    if _fingerprint is None:
+        h = hashlib.sha256(str(CACHE_VERSION).encode())
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in COMPILER_SOURCES:
+            with open(os.path.join(here, name), "rb") as f:
+                h.update(f.read())
+        _fingerprint = h.hexdigest()
+    return _fingerprint
+
+
+def cache_path(path: str) -> str:
+    base_dir, filename = os.path.split(path)
+    return os.path.join(base_dir, CACHE_DIR, filename + "c")
+
+
+class Module:
+    def __init__(self, name: str, path: str, source: str):
+        self.name = name
+        self.path = path
+        self.source = source
+        self.source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self.uses: List[str] = []
+        self.functions: Optional[Functions] = None
+        self.deps: List[str] = []
+        self.build_key: Optional[str] = None
+        self.cached_key: Optional[str] = None
+
+
+class ProjectBuilder:
+    def __init__(self, jobs: Optional[int] = None, use_cache: bool = True):
+        self.jobs = jobs
+        self.use_cache = use_cache
+        self.modules: Dict[str, Module] = {}
+        self.compiled: List[str] = []
+        self.reused: List[str] = []
+        self._executor = None
+
+    def build(self, entry: str) -> Tuple[Functions, List[str]]:
+        entry = os.path.abspath(entry)
+        try:
+            self.discover(entry)
+            order = self.init_order(entry)
+            self.compute_keys(order)
+            # Modules servis par le cache dont une dépendance a changé
+            self.compile_wave([m for m in order if m.cached_key is not None and m.cached_key != m.build_key])
+            for module in order:
+                if module.cached_key is None or module.cached_key != module.build_key:
+                    self.save_cache(module)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+        return self.link(order)
+
+    # --- Découverte et compilation ---
+
+    def load_module(self, name: str, path: str) -> Module:
+        with open(path, "r", encoding="utf-8") as f:
+            module = Module(name, path, f.read())
+        self.modules[path] = module
+        cached = self.load_cache(module)
+        if cached is not None:
+            module.uses = cached["uses"]
+            module.functions = cached["functions"]
+            module.cached_key = cached["build_key"]
+            self.reused.append(path)
+        return module
+
+    def discover(self, entry: str):
+        name = os.path.splitext(os.path.basename(entry))[0]
+        wave = [self.load_module(name, entry)]
+        while wave:
+            self.compile_wave([m for m in wave if m.functions is None])
+            next_wave = []
+            for module in wave:
+                base_dir = os.path.dirname(module.path)
+                for use in module.uses:
+                    path = resolve_module(use, base_dir)
+                    if path is None:
+                        continue
+                    module.deps.append(path)
+                    if path not in self.modules:
+                        next_wave.append(self.load_module(use, path))
+            wave = next_wave
+
+    def compile_wave(self, modules: List[Module]):
+        if not modules:
+            return
+        results = []
+        if len(modules) == 1 or self.jobs == 1:
+            for module in modules:
+                try:
+                    results.append(compile_source(module.source))
+                except Exception as e:
+                    raise BuildError(f"{module.path}: {e}") from e
+        else:
+            if self._executor is None:
+                # Importé à la demande : concurrent.futures coûte cher au démarrage
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+            futures = [self._executor.submit(compile_source, m.source) for m in modules]
+            for module, future in zip(modules, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # Erreur levée dans un worker : le chemin du module la situe
+                    raise BuildError(f"{module.path}: {e}") from e
+        for module, (functions, uses) in zip(modules, results):
+            module.functions = functions
+            module.uses = uses
+            if module.path in self.reused:
+                self.reused.remove(module.path)
+            self.compiled.append(module.path)
+
+    def init_order(self, entry: str) -> List[Module]:
+        """Modules en ordre d'initialisation (dépendances d'abord)."""
+        order: List[Module] = []
+        seen = set()
+
+        def visit(path: str):
+            if path in seen:
+                return
+            seen.add(path)
+            module = self.modules[path]
+            for dep in module.deps:
+                visit(dep)
+            order.append(module)
+
+        visit(entry)
+        return order
+
+    def compute_keys(self, order: List[Module]):
+        for module in order:
+            h = hashlib.sha256(module.source_hash.encode())
+            h.update(compiler_fingerprint().encode())
+            for dep in module.deps:
+                # Un cycle renvoie vers un module sans clé : on prend sa source
+                dep_module = self.modules[dep]
+                h.update((dep_module.build_key or dep_module.source_hash).encode())
+            module.build_key = h.hexdigest()
+
+    # --- Cache ---
+
+    def load_cache(self, module: Module) -> Optional[dict]:
+        if not self.use_cache:
+            return None
+        try:
+            with open(cache_path(module.path), "rb") as f:
+                cached = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if type(cached) is not dict or cached.get("version") != CACHE_VERSION or cached.get("source_hash") != module.source_hash:
+            return None
+        return cached
+
+    def save_cache(self, module: Module):
+        if not self.use_cache:
+            return
+        path = cache_path(module.path)
+        data = {
+            "version": CACHE_VERSION,
+            "source_hash": module.source_hash,
+            "build_key": module.build_key,
+            "uses": module.uses,
+            "functions": module.functions,
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                marshal.dump(data, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    # --- Édition de liens ---
+
+    def link(self, order: List[Module]) -> Tuple[Functions, List[str]]:
+        native_uses: List[str] = []
+        for module in order:
+            base_dir = os.path.dirname(module.path)
+            for use in module.uses:
+                if use not in native_uses and resolve_module(use, base_dir) is None:
+                    native_uses.append(use)
+
+        if len(order) == 1:
+            return order[0].functions, native_uses
+
+        functions: Functions = {}
+        owners: Dict[str, str] = {}
+        main_code: List[Tuple] = []
+        for module in order:
+            for name, fn in module.functions.items():
+                if name == "__main__":
+                    name = f"__init__:{module.name}"
+                    main_code.append(("CALL", name, 0))
+                    main_code.append(("POP",))
+                elif name in functions:
+                    raise BuildError(f"Function {name} defined in both {owners[name]} and {module.path}")
+                functions[name] = fn
+                owners[name] = module.path
+        main_code.append(("PUSH_CONST", None))
+        main_code.append(("RETURN",))
+        functions["__main__"] = ([], main_code)
+        return functions, native_uses
+
+
+def build_project(entry: str, jobs: Optional[int] = None, use_cache: bool = True) -> Tuple[Functions, List[str]]:
+    return ProjectBuilder(jobs=jobs, use_cache=use_cache).build(entry)
@@ -1,11 +1,235 @@
 # fluxia_bytecode.py
+"""
+Format de bytecode compact de Fluxia (fichiers .fxb).
 
-PUSH_NUM   = 1
-PUSH_STR   = 2
-LOAD_VAR   = 3
-STORE_VAR  = 4
-ADD        = 5
-SUB        = 6
-MUL        = 7
-DIV        = 8
-PRINT      = 9
+Le bytecode produit par Compiler est une liste de tuples par fonction :
+un tuple et des opérandes Python par instruction. Ici chaque instruction
+occupe 8 octets (struct "<HHI") :
+
+    opcode (u16)   numéro dans OPCODES
+    aux    (u16)   nombre d'arguments de CALL
+    arg    (u32)   indice de constante, indice de nom ou cible de saut
+
+Chaque fonction a sa table de constantes et sa table de noms (variables,
+fonctions appelées). Un opcode absent de OPCODES (intrinsèque ajouté par
+une extension) est codé INTRINSIC avec l'indice de son nom.
+
+Fichier :
+
+    MAGIC, version (u16), taille de l'index (u32)
+    index (marshal) : use, {fonction: (offset meta, taille meta, offset code, instructions)}
+    données : meta de chaque fonction (marshal : params, constantes, noms), puis code
+
+Les offsets sont relatifs au début des données. load_packed() ouvre le
+fichier avec mmap : les processus qui chargent le même fichier partagent
+ses pages. Une fonction n'est décodée en tuples qu'à son premier accès,
+les autres restent dans le fichier.
+"""
+
+import mmap
+import struct
+import marshal
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Tuple
+
+MAGIC = b"FXBC"
+VERSION = 1
+PACKED_SUFFIX = ".fxb"
+
+HEADER = struct.Struct("<4sHI")
+INSTRUCTION = struct.Struct("<HHI")
+
+OPCODES = (
+    "PUSH_CONST", "LOAD_VAR", "STORE_VAR", "POP",
+    "BINARY_ADD", "BINARY_SUB", "BINARY_MUL", "BINARY_DIV", "BINARY_MOD",
+    "BINARY_GT", "BINARY_LT", "BINARY_GTE", "BINARY_LTE", "BINARY_EQ", "BINARY_NEQ",
+    "UNARY_NOT",
+    "JUMP", "JUMP_IF_FALSE", "JUMP_IF_FALSE_OR_POP", "JUMP_IF_TRUE_OR_POP",
+    "CALL", "RETURN", "INTRINSIC",
+    "NEW_STACK", "PUSH_STACK", "POP_STACK",
+    "NEW_QUEUE", "ENQUEUE", "DEQUEUE",
+    "NEW_ABR", "INSERT_ABR", "SEARCH_ABR",
+    "SNAPSHOT_STACK", "SNAPSHOT_ABR",
+    "NEW_PQUEUE", "PQ_PUSH", "PQ_POP", "PQ_DECREASE", "PQ_SIZE",
+)
+OPCODE_NUMBERS = {name: i for i, name in enumerate(OPCODES)}
+
+# Nature de l'opérande arg
+CONST_OPS = frozenset(("PUSH_CONST",))
+NAME_OPS = frozenset(("LOAD_VAR", "STORE_VAR", "CALL", "INTRINSIC"))
+JUMP_OPS = frozenset(("JUMP", "JUMP_IF_FALSE", "JUMP_IF_FALSE_OR_POP", "JUMP_IF_TRUE_OR_POP"))
+
+INTRINSIC = OPCODE_NUMBERS["INTRINSIC"]
+
+# Instructions sans opérande : un seul tuple partagé par toutes les occurrences
+_BARE = {name: (name,) for name in OPCODES}
+
+Functions = Dict[str, Tuple[List[str], List[Tuple]]]
+
+
+class BytecodeError(Exception):
+    pass
+
+
+# === Encodage ===
+
+def encode_function(code: List[Tuple]) -> Tuple[List[Any], List[str], bytes]:
+    """Retourne (constantes, noms, code packé) d'une fonction."""
+    consts: List[Any] = []
+    const_index: Dict[Tuple[type, Any], int] = {}
+    names: List[str] = []
+    name_index: Dict[str, int] = {}
+    packed = bytearray(INSTRUCTION.size * len(code))
+    pack_into = INSTRUCTION.pack_into
+
+    for i, instr in enumerate(code):
+        op = instr[0]
+        number = OPCODE_NUMBERS.get(op)
+        aux = arg = 0
+        if number is None:
+            number, value = INTRINSIC, op
+        elif op in NAME_OPS:
+            value = instr[1]
+            if op == "CALL":
+                aux = instr[2]
+        else:
+            value = None
+        if value is not None:
+            arg = name_index.get(value)
+            if arg is None:
+                arg = name_index[value] = len(names)
+                names.append(value)
+        elif op in CONST_OPS:
+            # True et 1.0 sont égaux : la clé distingue les types
+            key = (type(instr[1]), instr[1])
+            arg = const_index.get(key)
+            if arg is None:
+                arg = const_index[key] = len(consts)
+                consts.append(instr[1])
+        elif op in JUMP_OPS:
+            arg = instr[1]
+        pack_into(packed, i * INSTRUCTION.size, number, aux, arg)
+    return consts, names, bytes(packed)
+
+
+def pack_program(functions: Functions, uses: List[str]) -> bytes:
+    metas: List[bytes] = []
+    codes: List[bytes] = []
+    layout = []
+    meta_size = 0
+    for fname, (params, code) in functions.items():
+        consts, names, packed = encode_function(code)
+        meta = marshal.dumps((list(params), consts, names))
+        layout.append((fname, meta_size, len(meta), len(code)))
+        metas.append(meta)
+        codes.append(packed)
+        meta_size += len(meta)
+
+    entries = {}
+    code_offset = meta_size
+    for (fname, meta_offset, meta_len, ninstr), packed in zip(layout, codes):
+        entries[fname] = (meta_offset, meta_len, code_offset, ninstr)
+        code_offset += len(packed)
+
+    index = marshal.dumps({"uses": list(uses), "functions": entries})
+    return b"".join([HEADER.pack(MAGIC, VERSION, len(index)), index] + metas + codes)
+
+
+def write_packed(path: str, functions: Functions, uses: List[str]):
+    with open(path, "wb") as f:
+        f.write(pack_program(functions, uses))
+
+
+# === Décodage ===
+
+def decode_function(data, meta_offset: int, meta_len: int, code_offset: int,
+                    ninstr: int) -> Tuple[List[str], List[Tuple]]:
+    params, consts, names = marshal.loads(data[meta_offset:meta_offset + meta_len])
+    code: List[Tuple] = []
+    append = code.append
+    end = code_offset + ninstr * INSTRUCTION.size
+    for number, aux, arg in INSTRUCTION.iter_unpack(data[code_offset:end]):
+        op = OPCODES[number]
+        if op == "PUSH_CONST":
+            append((op, consts[arg]))
+        elif op == "CALL":
+            append((op, names[arg], aux))
+        elif op == "INTRINSIC":
+            append(_BARE.get(names[arg]) or (names[arg],))
+        elif op in NAME_OPS:
+            append((op, names[arg]))
+        elif op in JUMP_OPS:
+            append((op, arg))
+        else:
+            append(_BARE[op])
+    return params, code
+
+
+class PackedFunctions(Mapping):
+    """Fonctions d'un fichier .fxb, décodées à la demande puis gardées."""
+
+    def __init__(self, data, entries: Dict[str, Tuple[int, int, int, int]], data_start: int, path: str = None):
+        self.data = data
+        self.entries = entries
+        self.data_start = data_start
+        self.path = path
+        self.decoded: Functions = {}
+
+    def __getitem__(self, name: str):
+        fn = self.decoded.get(name)
+        if fn is None:
+            meta_offset, meta_len, code_offset, ninstr = self.entries[name]
+            start = self.data_start
+            fn = decode_function(self.data, start + meta_offset, meta_len, start + code_offset, ninstr)
+            self.decoded[name] = fn
+        return fn
+
+    def __contains__(self, name) -> bool:
+        return name in self.entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def read_index(data) -> Tuple[List[str], Dict[str, Tuple[int, int, int, int]], int]:
+    if len(data) < HEADER.size:
+        raise BytecodeError("Truncated bytecode file")
+    magic, version, index_len = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise BytecodeError("Not a Fluxia bytecode file")
+    if version != VERSION:
+        raise BytecodeError(f"Unsupported bytecode version {version}")
+    index = marshal.loads(data[HEADER.size:HEADER.size + index_len])
+    return index["uses"], index["functions"], HEADER.size + index_len
+
+
+def unpack_program(data) -> Tuple[PackedFunctions, List[str]]:
+    uses, entries, data_start = read_index(data)
+    return PackedFunctions(data, entries, data_start), uses
+
+
+def load_packed(path: str) -> Tuple[PackedFunctions, List[str]]:
+    """Projette le fichier en mémoire (mmap, lecture seule)."""
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    uses, entries, data_start = read_index(data)
+    return PackedFunctions(data, entries, data_start, path), uses
+
+
+if __name__ == "__main__":
+    # python fluxia_bytecode.py programme.fx [sortie.fxb]
+    import os
+    import sys
+    from fluxia_build import build_project
+
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python fluxia_bytecode.py file.fx [out.fxb]")
+        sys.exit(1)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) == 3 else os.path.splitext(source)[0] + PACKED_SUFFIX
+    functions, uses = build_project(source)
+    write_packed(target, functions, uses)
+    print(f"{target}: {len(functions)} functions, {os.path.getsize(target)} bytes")
@@ -1,8 +1,34 @@
 from typing import List, Dict, Tuple
 from fluxia_parser import (
     Program, FunctionDef, VarDecl, Assign, If, While, Return,
-    Number, String, Bool, Var, BinaryOp, Call, Node
+    Number, String, Bool, Var, BinaryOp, LogicalOp, UnaryOp, Call, Node
 )
+from fluxia_intrinsics import INTRINSICS
+
+# Token d'opérateur -> instruction (tuple partagé par toutes les occurrences)
+OP_MAP: Dict[str, Tuple[str]] = {
+    "PLUS": ("BINARY_ADD",),
+    "MINUS": ("BINARY_SUB",),
+    "MUL": ("BINARY_MUL",),
+    "DIV": ("BINARY_DIV",),
+    "MOD": ("BINARY_MOD",),
+    "GT": ("BINARY_GT",),
+    "LT": ("BINARY_LT",),
+    "GTE": ("BINARY_GTE",),
+    "LTE": ("BINARY_LTE",),
+    "EQEQ": ("BINARY_EQ",),
+    "NEQ": ("BINARY_NEQ",),
+}
+
+# Opérateurs logiques : saut qui garde l'opérande gauche s'il décide du résultat
+LOGICAL_JUMPS = {
+    "ANDAND": "JUMP_IF_FALSE_OR_POP",
+    "OROR": "JUMP_IF_TRUE_OR_POP",
+}
+
+UNARY_OPS: Dict[str, Tuple[str]] = {
+    "NOT": ("UNARY_NOT",),
+}
 
 class CompilerError(Exception):
     pass
@@ -47,98 +73,131 @@ class Compiler:
         self.current_code = prev_code
         self.current_function = prev_name
 
+    # === Instructions ===
+
     def compile_stmt(self, node: Node):
-        if isinstance(node, VarDecl):
-            self.compile_expr(node.expr)
-            self.current_code.append(("STORE_VAR", node.name))
-        elif isinstance(node, Assign):
-            self.compile_expr(node.expr)
-            self.current_code.append(("STORE_VAR", node.name))
-        elif isinstance(node, If):
-            self.compile_expr(node.cond)
-            jmp_false_index = len(self.current_code)
-            self.current_code.append(("JUMP_IF_FALSE", None))
-            for s in node.then_body:
-                self.compile_stmt(s)
-            jmp_end_index = len(self.current_code)
-            self.current_code.append(("JUMP", None))
-            else_start = len(self.current_code)
-            self.current_code[jmp_false_index] = ("JUMP_IF_FALSE", else_start)
-            for s in node.else_body:
-                self.compile_stmt(s)
-            end_pos = len(self.current_code)
-            self.current_code[jmp_end_index] = ("JUMP", end_pos)
-        elif isinstance(node, While):
-            loop_start = len(self.current_code)
-            self.compile_expr(node.cond)
-            jmp_false_index = len(self.current_code)
-            self.current_code.append(("JUMP_IF_FALSE", None))
-            for s in node.body:
-                self.compile_stmt(s)
-            self.current_code.append(("JUMP", loop_start))
-            after_loop = len(self.current_code)
-            self.current_code[jmp_false_index] = ("JUMP_IF_FALSE", after_loop)
-        elif isinstance(node, Return):
-            self.compile_expr(node.expr)
-            self.current_code.append(("RETURN",))
-        else:
+        handler = STMT_HANDLERS.get(type(node))
+        if handler is None:
             # expression seule
             self.compile_expr(node)
             self.current_code.append(("POP",))
+        else:
+            handler(self, node)
+
+    def compile_store(self, node):
+        self.compile_expr(node.expr)
+        self.current_code.append(("STORE_VAR", node.name))
+
+    def compile_if(self, node: If):
+        code = self.current_code
+        self.compile_expr(node.cond)
+        jmp_false_index = len(code)
+        code.append(("JUMP_IF_FALSE", None))
+        for s in node.then_body:
+            self.compile_stmt(s)
+        jmp_end_index = len(code)
+        code.append(("JUMP", None))
+        code[jmp_false_index] = ("JUMP_IF_FALSE", len(code))
+        for s in node.else_body:
+            self.compile_stmt(s)
+        code[jmp_end_index] = ("JUMP", len(code))
+
+    def compile_while(self, node: While):
+        code = self.current_code
+        loop_start = len(code)
+        self.compile_expr(node.cond)
+        jmp_false_index = len(code)
+        code.append(("JUMP_IF_FALSE", None))
+        for s in node.body:
+            self.compile_stmt(s)
+        code.append(("JUMP", loop_start))
+        code[jmp_false_index] = ("JUMP_IF_FALSE", len(code))
+
+    def compile_return(self, node: Return):
+        self.compile_expr(node.expr)
+        self.current_code.append(("RETURN",))
+
+    # === Expressions ===
 
     def compile_expr(self, node: Node):
-        if isinstance(node, Number):
-            self.current_code.append(("PUSH_CONST", node.value))
-        elif isinstance(node, String):
-            self.current_code.append(("PUSH_CONST", node.value))
-        elif isinstance(node, Bool):
-            self.current_code.append(("PUSH_CONST", node.value))
-        elif isinstance(node, Var):
-            self.current_code.append(("LOAD_VAR", node.name))
-        elif isinstance(node, BinaryOp):
-            self.compile_expr(node.left)
+        try:
+            handler = EXPR_HANDLERS[type(node)]
+        except KeyError:
+            raise CompilerError(f"Unknown expression node {type(node).__name__}") from None
+        handler(self, node)
+
+    def compile_const(self, node):
+        self.current_code.append(("PUSH_CONST", node.value))
+
+    def compile_var(self, node: Var):
+        self.current_code.append(("LOAD_VAR", node.name))
+
+    def compile_binary(self, node: BinaryOp):
+        # Chaîne gauche (a + b + c ...) parcourue sans récursion
+        chain = []
+        while type(node) is BinaryOp:
+            chain.append(node)
+            node = node.left
+        self.compile_expr(node)
+        code = self.current_code
+        for node in reversed(chain):
             self.compile_expr(node.right)
-            op_map = {
-                "PLUS": "BINARY_ADD",
-                "MINUS": "BINARY_SUB",
-                "MUL": "BINARY_MUL",
-                "DIV": "BINARY_DIV",
-                "GT": "BINARY_GT",
-                "LT": "BINARY_LT",
-                "GTE": "BINARY_GTE",
-                "LTE": "BINARY_LTE",
-                "EQEQ": "BINARY_EQ",
-                "NEQ": "BINARY_NEQ",
-            }
-            if node.op not in op_map:
+            opcode = OP_MAP.get(node.op)
+            if opcode is None:
                 raise CompilerError(f"Unknown binary operator {node.op}")
-            self.current_code.append((op_map[node.op],))
-        elif isinstance(node, Call):
-            if node.func == "new_stack":
-                self.current_code.append(("NEW_STACK",))
-            elif node.func == "push_stack":
-                self.compile_expr(node.args[0])
-                self.current_code.append(("PUSH_STACK",))
-            elif node.func == "pop_stack":
-                self.current_code.append(("POP_STACK",))
-            elif node.func == "new_queue":
-                self.current_code.append(("NEW_QUEUE",))
-            elif node.func == "enqueue":
-                self.compile_expr(node.args[0])
-                self.current_code.append(("ENQUEUE",))
-            elif node.func == "dequeue":
-                self.current_code.append(("DEQUEUE",))
-            elif node.func == "new_abr":
-                self.current_code.append(("NEW_ABR",))
-            elif node.func == "insert_abr":
-                self.compile_expr(node.args[0])
-                self.current_code.append(("INSERT_ABR",))
-            elif node.func == "search_abr":
-                self.compile_expr(node.args[0])
-                self.current_code.append(("SEARCH_ABR",))
-            else:
-                for arg in node.args:
-                    self.compile_expr(arg)
-                self.current_code.append(("CALL", node.func, len(node.args)))
+            code.append(opcode)
+
+    def compile_logical(self, node: LogicalOp):
+        # a && b : a ; JUMP_IF_FALSE_OR_POP fin ; b ; fin:
+        chain = []
+        while type(node) is LogicalOp:
+            chain.append(node)
+            node = node.left
+        self.compile_expr(node)
+        code = self.current_code
+        for node in reversed(chain):
+            jump = LOGICAL_JUMPS.get(node.op)
+            if jump is None:
+                raise CompilerError(f"Unknown logical operator {node.op}")
+            jump_index = len(code)
+            code.append((jump, None))
+            self.compile_expr(node.right)
+            code[jump_index] = (jump, len(code))
+
+    def compile_unary(self, node: UnaryOp):
+        self.compile_expr(node.expr)
+        opcode = UNARY_OPS.get(node.op)
+        if opcode is None:
+            raise CompilerError(f"Unknown unary operator {node.op}")
+        self.current_code.append(opcode)
+
+    def compile_call(self, node: Call):
+        for arg in node.args:
+            self.compile_expr(arg)
+        intrinsic = INTRINSICS.get(node.func)
+        if intrinsic is not None and intrinsic.argc == len(node.args):
+            self.current_code.append((intrinsic.opcode,))
         else:
-            raise CompilerError(f"Unknown expression node {type(node).__name__}")
\ No newline at end of file
+            # Mauvais nombre d'arguments : CALL, l'erreur est levée à l'exécution
+            self.current_code.append(("CALL", node.func, len(node.args)))
+
+
+# Type de nœud -> méthode de compilation
+STMT_HANDLERS = {
+    VarDecl: Compiler.compile_store,
+    Assign: Compiler.compile_store,
+    If: Compiler.compile_if,
+    While: Compiler.compile_while,
+    Return: Compiler.compile_return,
+}
+
+EXPR_HANDLERS = {
+    Number: Compiler.compile_const,
+    String: Compiler.compile_const,
+    Bool: Compiler.compile_const,
+    Var: Compiler.compile_var,
+    BinaryOp: Compiler.compile_binary,
+    LogicalOp: Compiler.compile_logical,
+    UnaryOp: Compiler.compile_unary,
+    Call: Compiler.compile_call,
+}
@@ -0,0 +1,379 @@
+# fluxia_conformance.py
+"""
+Conformité et performance différentielles des modes d'exécution Fluxia.
+
+Usage :
+    python fluxia_conformance.py [--count N] [--seed S] [--modes vm,py,reg,packed]
+                                 [--save DIR] [--show]
+
+ProgramGenerator écrit des programmes Fluxia aléatoires à partir de la
+grammaire acceptée par fluxia_parser.Parser : fonctions, let, affectations,
+if/else, while, return, appels, opérateurs arithmétiques, de comparaison et
+logiques, print et intrinsèques des structures. Les programmes terminent
+toujours : les fonctions n'appellent que des fonctions définies avant elles,
+chaque boucle a son propre compteur borné, et un budget d'appels limite le
+coût total.
+
+Chaque programme est compilé une fois puis exécuté dans chaque mode ; la
+sortie de print, la valeur de retour et l'erreur éventuelle (type et
+message) doivent être identiques à celles de la VM de référence (premier
+mode). Les temps de construction de la VM (traduction pour py et reg,
+encodage et décodage pour packed) et d'exécution de chaque mode sont
+cumulés pour le rapport.
+
+Un programme divergent est réexécuté seul avec --seed S --count 1 (S est
+affiché dans le rapport) ; --save écrit sa source dans DIR.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fluxia_lexer import lex
+from fluxia_parser import Parser
+from fluxia_compiler import Compiler
+from fluxia_output import CaptureSink
+from fluxia_backends import BACKENDS, load_backend
+
+
+class ConformanceError(Exception):
+    pass
+
+
+# === Modes d'exécution ===
+# Un mode construit une VM prête à lancer à partir du bytecode compilé.
+
+def _backend_mode(name: str) -> Callable:
+    def build(functions, uses, output):
+        return load_backend(name)(functions, uses, output=output)
+    return build
+
+
+def _packed_mode(functions, uses, output):
+    # VM de référence sur le bytecode packé (fluxia_bytecode) : encodage puis décodage
+    from fluxia_bytecode import pack_program, unpack_program
+    from fluxia_vm import FluxiaVM
+    packed, packed_uses = unpack_program(pack_program(functions, uses))
+    return FluxiaVM(packed, packed_uses, output=output)
+
+
+MODES: Dict[str, Callable] = {name: _backend_mode(name) for name in BACKENDS}
+MODES["packed"] = _packed_mode
+
+
+# === Génération de programmes ===
+
+class ProgramGenerator:
+    """Programme Fluxia aléatoire qui termine toujours.
+
+    `budget` borne le nombre d'appels de fonctions exécutés : chaque appel
+    coûte le coût estimé de la fonction appelée, multiplié par les tours
+    des boucles qui l'entourent.
+    `risk` est la probabilité qu'une instruction du programme puisse
+    échouer (voir risky()).
+    """
+
+    def __init__(self, rng: random.Random, functions: int = 4, globals_: int = 4,
+                 statements: int = 6, depth: int = 3, loop_max: int = 6, budget: int = 400,
+                 risk: float = 0.2):
+        self.rng = rng
+        self.nfunctions = functions
+        self.globals = [f"g{i}" for i in range(globals_)]
+        self.nstatements = statements
+        self.depth = depth
+        self.loop_max = loop_max
+        self.budget = budget
+        self.risk = risk
+        self.counters = 0
+        # Fonction définie -> (paramètres, coût estimé)
+        self.defined: Dict[str, Tuple[int, int]] = {}
+        self.params: List[str] = []
+        self.cost = 0
+        self.multiplier = 1
+
+    def generate(self) -> str:
+        rng = self.rng
+        lines = ["let s0 = new_stack();", "let q0 = new_pqueue();"]
+        for name in self.globals:
+            lines.append(f"let {name} = {self.number()};")
+        for i in range(self.nfunctions):
+            lines.append(self.function(f"f{i}", rng.randint(0, 3)))
+        self.params = []
+        self.cost = 0
+        self.multiplier = 1
+        statements = self.block(self.nstatements, 0, in_function=False)
+        if rng.random() < self.risk:
+            # Instruction de premier niveau : jamais coupée d'un bloc
+            position = rng.choice([i for i, line in enumerate(statements) if not line.startswith(" ")]
+                                  + [len(statements)])
+            statements.insert(position, f"print({self.risky(self.depth)});")
+        lines.extend(statements)
+        lines.append("fn main() {")
+        lines.extend(self.block(rng.randint(1, 3), 1, in_function=False))
+        lines.append(f"    return {self.expr(self.depth)};")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    # --- Déclarations ---
+
+    def function(self, name: str, nparams: int) -> str:
+        self.params = [f"a{i}" for i in range(nparams)]
+        self.cost = 1
+        self.multiplier = 1
+        body = self.block(self.rng.randint(1, self.nstatements), 1, in_function=True)
+        body.append(f"    return {self.expr(self.depth)};")
+        self.defined[name] = (nparams, self.cost)
+        return f"fn {name}({', '.join(self.params)}) {{\n" + "\n".join(body) + "\n}"
+
+    def block(self, count: int, indent: int, in_function: bool) -> List[str]:
+        lines: List[str] = []
+        for _ in range(count):
+            lines.extend(self.statement(indent, in_function))
+        return lines
+
+    def statement(self, indent: int, in_function: bool) -> List[str]:
+        rng = self.rng
+        pad = "    " * indent
+        nested = indent < 3
+        kind = rng.choices(
+            ("assign", "let", "print", "if", "while", "call", "push", "pq", "return"),
+            (5, 2, 3, 2 if nested else 0, 2 if nested else 0, 2, 1, 1, 1 if in_function else 0))[0]
+        if kind == "assign":
+            return [f"{pad}{self.target()} = {self.expr(self.depth)};"]
+        if kind == "let":
+            return [f"{pad}let {rng.choice(self.globals)} = {self.expr(self.depth)};"]
+        if kind == "print":
+            args = ", ".join(self.string() if rng.random() < 0.2 else self.expr(self.depth - 1)
+                             for _ in range(rng.randint(1, 3)))
+            return [f"{pad}print({args});"]
+        if kind == "if":
+            lines = [f"{pad}if ({self.expr(self.depth)}) {{"]
+            lines += self.block(rng.randint(1, 3), indent + 1, in_function)
+            if rng.random() < 0.5:
+                lines.append(f"{pad}}} else {{")
+                lines += self.block(rng.randint(1, 3), indent + 1, in_function)
+            lines.append(f"{pad}}}")
+            return lines
+        if kind == "while":
+            # Compteur propre à la boucle : jamais écrit par le corps
+            counter = f"i{self.counters}"
+            self.counters += 1
+            turns = rng.randint(0, self.loop_max)
+            saved = self.multiplier
+            self.multiplier *= max(turns, 1)
+            lines = [f"{pad}let {counter} = 0;", f"{pad}while ({counter} < {turns}) {{"]
+            lines += self.block(rng.randint(1, 3), indent + 1, in_function)
+            lines.append(f"{pad}    {counter} = {counter} + 1;")
+            lines.append(f"{pad}}}")
+            self.multiplier = saved
+            return lines
+        if kind == "call":
+            return [f"{pad}{self.call(self.depth)};"] if self.defined else [f"{pad}print({self.expr(self.depth)});"]
+        if kind == "push":
+            return [f"{pad}push_stack(s0, {self.expr(self.depth - 1)});"]
+        if kind == "pq":
+            return [f"{pad}pq_push(q0, {self.expr(self.depth - 1)}, {self.expr(self.depth - 1)});"]
+        return [f"{pad}return {self.expr(self.depth)};"]
+
+    def target(self) -> str:
+        if self.params and self.rng.random() < 0.5:
+            return self.rng.choice(self.params)
+        return self.rng.choice(self.globals)
+
+    # --- Expressions ---
+
+    def number(self) -> str:
+        if self.rng.random() < 0.7:
+            return str(self.rng.randint(0, 20))
+        return f"{self.rng.randint(0, 9)}.{self.rng.randint(0, 99)}"
+
+    def call(self, depth: int) -> str:
+        rng = self.rng
+        candidates = [(name, arity) for name, (arity, cost) in self.defined.items()
+                      if self.cost + self.multiplier * cost <= self.budget]
+        if not candidates:
+            return self.atom()
+        name, arity = rng.choice(candidates)
+        self.cost += self.multiplier * self.defined[name][1]
+        return f"{name}({', '.join(self.expr(depth - 1) for _ in range(arity))})"
+
+    def expr(self, depth: int) -> str:
+        """Expression numérique (les booléens en sont, comme en Python)."""
+        rng = self.rng
+        if depth <= 0 or rng.random() < 0.25:
+            return self.atom()
+        kind = rng.choices(("binary", "div", "compare", "strings", "logical", "not", "neg", "call", "size"),
+                           (6, 2, 3, 1, 2, 1, 1, 2, 1))[0]
+        if kind == "binary":
+            op = rng.choice(("+", "-", "*"))
+            text = f"{self.expr(depth - 1)} {op} {self.expr(depth - 1)}"
+        elif kind == "div":
+            # Diviseur strictement positif
+            op = rng.choice(("/", "%"))
+            divisor = self.atom()
+            text = f"{self.expr(depth - 1)} {op} ({divisor} * {divisor} + 1)"
+        elif kind == "compare":
+            op = rng.choice(("<", ">", "<=", ">=", "==", "!="))
+            text = f"{self.expr(depth - 1)} {op} {self.expr(depth - 1)}"
+        elif kind == "strings":
+            op = rng.choice(("==", "!=", "<"))
+            # Toujours entre parenthèses : `x + "a" == "b"` additionnerait la chaîne
+            return self.paren(f"{self.string()} {op} {self.string()}")
+        elif kind == "logical":
+            op = rng.choice(("&&", "||"))
+            text = f"{self.expr(depth - 1)} {op} {self.expr(depth - 1)}"
+        elif kind == "not":
+            return f"!{self.paren(self.expr(depth - 1))}"
+        elif kind == "neg":
+            return f"-{self.paren(self.expr(depth - 1))}"
+        elif kind == "call":
+            return self.call(depth)
+        else:
+            return "pq_size(q0)"
+        # Parenthèses facultatives : la précédence du parser est aussi exercée
+        return self.paren(text) if rng.random() < 0.7 else text
+
+    def risky(self, depth: int) -> str:
+        """Construction qui peut échouer à l'exécution (chaîne dans un calcul,
+        structure vide, division par zéro) : exerce les chemins d'erreur."""
+        rng = self.rng
+        kind = rng.choice(("string", "pop", "div"))
+        if kind == "string":
+            return self.paren(f"{self.expr(depth - 1)} {rng.choice('+-*/%<')} {self.string()}")
+        if kind == "pop":
+            return rng.choice(("pop_stack(s0)", "pq_pop(q0)"))
+        return self.paren(f"{self.expr(depth - 1)} {rng.choice('/%')} {self.expr(depth - 1)}")
+
+    def paren(self, text: str) -> str:
+        return f"({text})"
+
+    def atom(self) -> str:
+        rng = self.rng
+        kind = rng.choices(("number", "var", "bool"), (4, 5, 1))[0]
+        if kind == "number":
+            return self.number()
+        if kind == "var":
+            return self.target()
+        return rng.choice(("true", "false"))
+
+    def string(self) -> str:
+        return '"' + "".join(self.rng.choice("abcxyz ") for _ in range(self.rng.randint(0, 4))) + '"'
+
+
+def generate_program(seed: int, **options) -> str:
+    return ProgramGenerator(random.Random(seed), **options).generate()
+
+
+# === Exécution différentielle ===
+
+Outcome = Tuple[str, str, Optional[Tuple[str, str]]]
+
+
+def run_mode(mode: str, functions, uses) -> Tuple[Outcome, float, float]:
+    """Exécute le programme dans un mode ; retourne (sortie, repr du
+    résultat, erreur), le temps de construction de la VM et celui de
+    l'exécution."""
+    output = CaptureSink()
+    result = error = None
+    t0 = t1 = time.perf_counter()
+    try:
+        vm = MODES[mode](functions, uses, output)
+        t1 = time.perf_counter()
+        result = vm.run()
+    except Exception as e:
+        error = (type(e).__name__, str(e))
+    t2 = time.perf_counter()
+    # repr : nan == nan est faux, mais leurs repr sont égales
+    return (output.getvalue(), repr(result), error), t1 - t0, t2 - t1
+
+
+def compile_program(source: str):
+    return Compiler().compile(Parser(lex(source)).parse())
+
+
+class ConformanceReport:
+    def __init__(self, modes: List[str]):
+        self.modes = modes
+        self.programs = 0
+        self.errors = 0
+        # Mode -> [construction, exécution] cumulées (secondes)
+        self.times: Dict[str, List[float]] = {mode: [0.0, 0.0] for mode in modes}
+        self.failures: List[Tuple[int, str, Dict[str, Outcome]]] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def format(self) -> str:
+        reference = self.times[self.modes[0]][1]
+        lines = [f"programs {self.programs}  ended with an error {self.errors}  "
+                 f"mismatches {len(self.failures)}",
+                 f"{'mode':<9}{'setup ms':>10}{'run ms':>10}{'vs ' + self.modes[0]:>9}"]
+        for mode in self.modes:
+            setup, run = self.times[mode]
+            speedup = reference / run if run else 0.0
+            lines.append(f"{mode:<9}{setup * 1000:>10.2f}{run * 1000:>10.2f}{speedup:>8.2f}x")
+        for seed, _, outcomes in self.failures:
+            lines.append(f"MISMATCH seed {seed}:")
+            for mode, (output, result, error) in outcomes.items():
+                lines.append(f"  {mode:<7} result={result} error={error} output={output[-200:]!r}")
+        return "\n".join(lines)
+
+
+def check_program(source: str, modes: List[str], report: ConformanceReport, seed: int = -1) -> bool:
+    functions, uses = compile_program(source)
+    outcomes: Dict[str, Outcome] = {}
+    for mode in modes:
+        outcome, setup, run = run_mode(mode, functions, uses)
+        outcomes[mode] = outcome
+        times = report.times[mode]
+        times[0] += setup
+        times[1] += run
+    report.programs += 1
+    reference = outcomes[modes[0]]
+    if reference[2] is not None:
+        report.errors += 1
+    if any(outcome != reference for outcome in outcomes.values()):
+        report.failures.append((seed, source, outcomes))
+        return False
+    return True
+
+
+def run_conformance(count: int = 200, seed: int = 0, modes: Optional[List[str]] = None,
+                    save: Optional[str] = None, show: bool = False, **options) -> ConformanceReport:
+    modes = modes or list(MODES)
+    for mode in modes:
+        if mode not in MODES:
+            raise ConformanceError(f"Unknown mode {mode}")
+    report = ConformanceReport(modes)
+    for i in range(count):
+        program_seed = seed + i
+        source = generate_program(program_seed, **options)
+        if show:
+            print(f"// seed {program_seed}\n{source}")
+        if not check_program(source, modes, report, program_seed) and save:
+            os.makedirs(save, exist_ok=True)
+            with open(os.path.join(save, f"mismatch_{program_seed}.fx"), "w", encoding="utf-8") as f:
+                f.write(source)
+    return report
+
+
+def main(argv: List[str] = None):
+    ap = argparse.ArgumentParser(description="Conformité différentielle des modes d'exécution Fluxia.")
+    ap.add_argument("--count", type=int, default=200, help="nombre de programmes générés")
+    ap.add_argument("--seed", type=int, default=0, help="graine du premier programme")
+    ap.add_argument("--modes", default=",".join(MODES),
+                    help=f"modes comparés, le premier sert de référence ({', '.join(MODES)})")
+    ap.add_argument("--save", metavar="DIR", help="écrit les programmes divergents dans DIR")
+    ap.add_argument("--show", action="store_true", help="affiche chaque programme généré")
+    args = ap.parse_args(argv)
+    report = run_conformance(args.count, args.seed, args.modes.split(","), args.save, args.show)
+    print(report.format())
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
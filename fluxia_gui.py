@@ -8,19 +8,53 @@ use gui;
 
 fn build_ui(win) {
     gui_label(win, "Hello from Fluxia GUI!");
+    status = gui_label(win, "0 clic");
     gui_button(win, "Click me", "on_click");
 }
 
 fn on_click() {
-    print("Button clicked!");
+    clics = clics + 1;
+    gui_set_text(status, clics);
 }
 
 fn main() {
+    clics = 0;
     gui_app("Fluxia GUI Demo", "build_ui");
 }
+
+Les callbacks des boutons ne s'exécutent pas sur le thread de l'interface :
+GuiBridge les confie à un thread worker qui a sa propre VM (pile et frames,
+voir FluxiaVM.spawn_context) et partage les fonctions, les globals et la
+sortie de la VM principale. Pendant app.exec() la VM principale est bloquée
+dans gui_app : un seul thread exécute du code Fluxia à la fois.
+
+Dans un callback, gui_label, gui_button et gui_set_text ne touchent pas aux
+widgets : les modifications sont accumulées puis envoyées par lots au
+thread de l'interface (signal Qt en connexion différée), à la fin du
+callback et toutes les BATCH_INTERVAL secondes pendant un callback long
+(thread fluxia-gui-flush) : un callback qui affiche "calcul..." puis calcule
+longtemps montre ce texte pendant le calcul.
+gui_label et gui_button y retournent un WidgetHandle, utilisable par
+gui_set_text comme le widget lui-même.
+
+Un clic sur un bouton dont le callback attend déjà son tour est ignoré :
+une rafale de clics pendant un callback lent donne une seule exécution
+supplémentaire.
+
+Sans affichage (tests, CI), la plateforme offscreen de Qt suffit :
+
+    QT_QPA_PLATFORM=offscreen python script_de_test.py
+
+    app, main, bridge = build_window(vm, "Test", "build_ui")
+    bouton.click()
+    bridge.wait_idle()   # callbacks terminés et mises à jour appliquées
+
+(voir tests/test_gui.py).
 """
 
-from typing import Any
+import queue
+import threading
+from typing import Any, Callable, List, Optional, Tuple
 
 try:
     from PySide6 import QtWidgets, QtCore
@@ -30,11 +64,26 @@ except ImportError as e:
         "    pip install PySide6\n"
     ) from e
 
+# Lot de mises à jour envoyé au plus tard après BATCH_INTERVAL secondes
+# pendant un callback, ou dès qu'il atteint BATCH_SIZE opérations
+BATCH_INTERVAL = 0.05
+BATCH_SIZE = 256
+
+
+class GuiError(Exception):
+    pass
 
-def setup_gui_builtins(vm: "FluxiaVM"):
-    vm.builtins["gui_app"] = lambda title, builder_name: gui_app(vm, title, builder_name)
+
+def setup_gui_builtins(vm: "FluxiaVM") -> "GuiBridge":
+    """Installe les builtins gui_* ; un seul GuiBridge par VM."""
+    bridge = vm.gui_bridge
+    if bridge is None:
+        bridge = vm.gui_bridge = GuiBridge(vm)
+    vm.builtins["gui_app"] = lambda title, builder_name: gui_app(vm, title, builder_name, bridge)
     vm.builtins["gui_label"] = lambda win, text: gui_label(win, text)
-    vm.builtins["gui_button"] = lambda win, text, callback_name: gui_button(vm, win, text, callback_name)
+    vm.builtins["gui_button"] = lambda win, text, callback_name: gui_button(bridge, win, text, callback_name)
+    vm.builtins["gui_set_text"] = lambda target, text: gui_set_text(target, text)
+    return bridge
 
 
 class FluxiaWindow:
@@ -47,11 +96,167 @@ class FluxiaWindow:
         self.widget.setLayout(self.layout)
 
 
-def gui_app(vm: "FluxiaVM", title: str, builder_name: str) -> None:
-    """Crée l'app Qt, une fenêtre, appelle la fonction Fluxia builder_name(win) puis lance la boucle."""
+class WidgetHandle:
+    """Widget créé depuis un callback : `widget` est renseigné quand le
+    thread de l'interface applique la création."""
+    __slots__ = ("widget",)
+
+    def __init__(self):
+        self.widget = None
+
+
+class GuiBridge(QtCore.QObject):
+    """Exécute les callbacks Fluxia sur un thread worker et renvoie leurs
+    modifications de widgets au thread de l'interface."""
+
+    updates_ready = QtCore.Signal(object)
+
+    def __init__(self, vm: "FluxiaVM"):
+        super().__init__()
+        self.vm = vm
+        self.worker_vm = None
+        # Callbacks planifiés mais pas encore commencés (regroupement des clics)
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.callbacks: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.batch: List[Tuple[Callable, Tuple]] = []
+        self.batch_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.updates_ready.connect(self.apply_updates, QtCore.Qt.ConnectionType.QueuedConnection)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        # VM du worker créée au premier clic : la VM principale a fini
+        # d'exécuter le code de premier niveau et la fonction de construction
+        worker = self.vm.spawn_context()
+        worker.builtins["gui_app"] = self._worker_gui_app
+        worker.builtins["gui_label"] = self._worker_gui_label
+        worker.builtins["gui_button"] = self._worker_gui_button
+        worker.builtins["gui_set_text"] = self._worker_gui_set_text
+        self.worker_vm = worker
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="fluxia-gui", daemon=True)
+        self._thread.start()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="fluxia-gui-flush", daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        """Termine les callbacks planifiés puis arrête le worker. Sans délai
+        maximal : la VM principale ne doit pas reprendre pendant qu'un
+        callback modifie encore les globals partagés."""
+        if self._thread is not None:
+            self.callbacks.put(None)
+            self._thread.join()
+            self._thread = None
+            self._stopping.set()
+            self._flusher.join()
+            self._flusher = None
+
+    # --- Thread de l'interface ---
+
+    def click(self, callback_name: str) -> bool:
+        """Planifie callback_name() ; False si ce callback attend déjà son tour."""
+        with self.lock:
+            if callback_name in self.pending:
+                return False
+            self.pending.add(callback_name)
+        self.start()
+        self.callbacks.put(callback_name)
+        return True
+
+    def apply_updates(self, batch: List[Tuple[Callable, Tuple]]):
+        for apply, args in batch:
+            try:
+                apply(*args)
+            except Exception as e:
+                print("Erreur de mise à jour de l'interface :", e)
+
+    def wait_idle(self):
+        """Attend la fin des callbacks planifiés puis applique leurs mises à
+        jour (tests : aucune boucle d'événements ne tourne)."""
+        self.callbacks.join()
+        QtCore.QCoreApplication.processEvents()
+
+    # --- Thread worker ---
+
+    def _run(self):
+        while True:
+            callback_name = self.callbacks.get()
+            if callback_name is None:
+                self.callbacks.task_done()
+                return
+            vm = self.worker_vm
+            with self.lock:
+                self.pending.discard(callback_name)
+            try:
+                vm.call_function(callback_name, [])
+            except Exception as e:
+                # L'appel interrompu laisse sa pile et ses frames
+                vm.stack.clear()
+                vm.call_stack.clear()
+                print("Erreur dans le callback bouton :", e)
+            finally:
+                vm.output.flush()
+                self.flush_updates()
+                self.callbacks.task_done()
+
+    def queue_update(self, apply: Callable, *args):
+        with self.batch_lock:
+            self.batch.append((apply, args))
+            full = len(self.batch) >= BATCH_SIZE
+        if full:
+            self.flush_updates()
+
+    def flush_updates(self):
+        # Émis sous le verrou : les lots du worker et du thread de vidage
+        # arrivent à l'interface dans l'ordre des modifications
+        with self.batch_lock:
+            if self.batch:
+                batch, self.batch = self.batch, []
+                self.updates_ready.emit(batch)
+
+    def _flush_periodically(self):
+        # Le callback peut calculer longtemps sans appeler de builtin gui_* :
+        # le lot en attente part quand même au bout de BATCH_INTERVAL
+        while not self._stopping.wait(BATCH_INTERVAL):
+            self.flush_updates()
+
+    def _worker_gui_app(self, title, builder_name):
+        raise GuiError("gui_app cannot be called from a GUI callback")
+
+    def _worker_gui_label(self, win, text):
+        handle = WidgetHandle()
+        self.queue_update(self._create_label, handle, win, text)
+        return handle
+
+    def _worker_gui_button(self, win, text, callback_name):
+        handle = WidgetHandle()
+        self.queue_update(self._create_button, handle, win, text, callback_name)
+        return handle
+
+    def _worker_gui_set_text(self, target, text):
+        self.queue_update(gui_set_text, target, text)
+
+    def _create_label(self, handle: WidgetHandle, win: FluxiaWindow, text: Any):
+        handle.widget = gui_label(win, text)
+
+    def _create_button(self, handle: WidgetHandle, win: FluxiaWindow, text: Any, callback_name: str):
+        handle.widget = gui_button(self, win, text, callback_name)
+
+
+def build_window(vm: "FluxiaVM", title: str, builder_name: str,
+                 bridge: Optional[GuiBridge] = None) -> Tuple[QtWidgets.QApplication, QtWidgets.QWidget, GuiBridge]:
+    """Crée l'app Qt et la fenêtre, appelle builder_name(win) sur le thread
+    de l'interface ; la boucle d'événements n'est pas lancée."""
     app = QtWidgets.QApplication.instance()
     if app is None:
         app = QtWidgets.QApplication([])
+    if bridge is None:
+        # Le bridge des gui_button créés par builder_name
+        bridge = setup_gui_builtins(vm)
 
     main = QtWidgets.QWidget()
     main.setWindowTitle(str(title))
@@ -63,9 +268,17 @@ def gui_app(vm: "FluxiaVM", title: str, builder_name: str) -> None:
         vm.call_function(builder_name, [win])
     except Exception as e:
         print("Erreur dans la fonction de construction d'UI :", e)
+    vm.output.flush()
+    app.aboutToQuit.connect(bridge.stop)
+    return app, main, bridge
+
 
+def gui_app(vm: "FluxiaVM", title: str, builder_name: str, bridge: Optional[GuiBridge] = None) -> None:
+    """Crée l'app Qt, une fenêtre, appelle la fonction Fluxia builder_name(win) puis lance la boucle."""
+    app, main, bridge = build_window(vm, title, builder_name, bridge)
     main.show()
     app.exec()
+    bridge.stop()
     return None
 
 
@@ -77,16 +290,17 @@ def gui_label(win: FluxiaWindow, text: Any):
     return lbl
 
 
-def gui_button(vm: "FluxiaVM", win: FluxiaWindow, text: Any, callback_name: str):
-    """Ajoute un QPushButton et connecte le clic à une fonction Fluxia."""
+def gui_button(bridge: GuiBridge, win: FluxiaWindow, text: Any, callback_name: str):
+    """Ajoute un QPushButton ; un clic planifie la fonction Fluxia sur le worker."""
     btn = QtWidgets.QPushButton(str(text), win.widget)
-
-    def on_click():
-        try:
-            vm.call_function(callback_name, [])
-        except Exception as e:
-            print("Erreur dans le callback bouton :", e)
-
-    btn.clicked.connect(on_click)
+    btn.clicked.connect(lambda checked=False: bridge.click(callback_name))
     win.layout.addWidget(btn)
     return btn
+
+
+def gui_set_text(target: Any, text: Any):
+    """Change le texte d'un label ou d'un bouton (widget ou WidgetHandle)."""
+    widget = target.widget if isinstance(target, WidgetHandle) else target
+    if widget is None:
+        raise GuiError("Widget not created yet")
+    widget.setText(str(text))
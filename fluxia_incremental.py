@@ -0,0 +1,336 @@
+# fluxia_incremental.py
+"""
+Recompilation incrémentale pour le REPL et le rechargement à chaud.
+
+Le source est découpé en éléments de premier niveau : chaque `fn` forme un
+élément, tout le code de premier niveau (use et instructions) forme
+l'élément `__main__`. Le découpage ne lexe pas le fichier : une seule
+expression régulière repère les chaînes, les accolades et le mot-clé fn.
+
+À chaque update() :
+- le préfixe et le suffixe communs avec la version précédente sont
+  conservés ; seule la zone modifiée est redécoupée, jusqu'à retomber sur
+  le début d'une fonction inchangée ;
+- un élément dont le texte a changé est lexé ; il n'est recompilé que si
+  ses tokens (type et valeur, sans les positions) ont changé ;
+- un nom défini plusieurs fois garde sa dernière définition, comme avec
+  une compilation complète : si elle disparaît, la précédente est reprise ;
+- les fonctions recompilées sont remplacées à chaud dans la VM existante
+  avec FluxiaVM.load_functions ; les globals sont conservés.
+
+Les fonctions qui suivent la zone modifiée gardent leur distance à la fin
+du source (voir Item) : elles ne sont pas décalées une à une, seules celles
+que l'édition a traversées depuis la précédente changent de représentation.
+Hors la comparaison des deux versions (par blocs, à la vitesse d'une copie
+mémoire), le coût d'une édition dépend donc de la taille de la zone
+modifiée, pas de celle du fichier. La session porte sur un seul fichier : un `use` vers un
+autre fichier .fx n'est pas suivi (voir fluxia_build pour les projets).
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from fluxia_lexer import lex, Token
+from fluxia_parser import Parser
+from fluxia_compiler import Compiler
+from fluxia_vm import FluxiaVM
+
+# Même syntaxe de chaîne que le lexer : une accolade dans une chaîne ne compte pas
+SCAN_REGEX = re.compile(r'"(\\.|[^"])*"|[{}]|\bfn\b')
+
+# Comparaison des versions par blocs : premier bloc, puis taille doublée
+# jusqu'à BLOCK_MAX ; le bloc qui diffère est ensuite coupé en deux
+BLOCK_MIN = 64
+BLOCK_MAX = 64 * 1024
+
+
+class Item:
+    """Fonction de premier niveau. Avant la zone de la dernière édition,
+    start et end sont des positions dans le source et row le nombre de fins
+    de ligne avant start ; après (from_end), ce sont des distances à la fin
+    du source, qu'une édition plus haut ne change pas."""
+    __slots__ = ("start", "end", "row", "name", "fp", "from_end")
+
+    def __init__(self, start: int, end: int, row: int, name: str, fp: int):
+        self.start = start
+        self.end = end
+        self.row = row
+        self.name = name
+        self.fp = fp
+        self.from_end = False
+
+    def flip(self, length: int, rows: int):
+        """Passe d'une représentation à l'autre dans un source de `length`
+        caractères et `rows` fins de ligne."""
+        self.start, self.end = length - self.start, length - self.end
+        self.row = rows - self.row
+        self.from_end = not self.from_end
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    pos = 0
+    block = BLOCK_MIN
+    while pos < n:
+        end = min(pos + block, n)
+        if a[pos:end] != b[pos:end]:
+            while end - pos > BLOCK_MIN:
+                mid = (pos + end) // 2
+                if a[pos:mid] == b[pos:mid]:
+                    pos = mid
+                else:
+                    end = mid
+            while a[pos] == b[pos]:
+                pos += 1
+            return pos
+        pos = end
+        block = min(block * 2, BLOCK_MAX)
+    return n
+
+
+def common_suffix_length(a: str, b: str, limit: int) -> int:
+    """Longueur du suffixe commun, au plus `limit` (comparaison depuis la fin)."""
+    la, lb = len(a), len(b)
+    k = 0
+    block = BLOCK_MIN
+    while k < limit:
+        end = min(k + block, limit)
+        if a[la - end:la - k] != b[lb - end:lb - k]:
+            while end - k > BLOCK_MIN:
+                mid = (k + end) // 2
+                if a[la - mid:la - k] == b[lb - mid:lb - k]:
+                    k = mid
+                else:
+                    end = mid
+            while a[la - k - 1] == b[lb - k - 1]:
+                k += 1
+            return k
+        k = end
+        block = min(block * 2, BLOCK_MAX)
+    return limit
+
+
+def fingerprint(tokens: List[Token]) -> int:
+    return hash(tuple([(t.type, t.value) for t in tokens]))
+
+
+def compile_function_tokens(tokens: List[Token]) -> Tuple[List[str], List[Tuple]]:
+    last = tokens[-1]
+    program = Parser(tokens + [Token("EOF", "", last.line, last.col)]).parse()
+    compiler = Compiler()
+    compiler.compile_function(program.functions[0])
+    return compiler.functions[program.functions[0].name]
+
+
+def gaps(source: str, start: int, end: int, spans: List[Tuple[int, int]]) -> List[str]:
+    """Texte de premier niveau de [start, end) hors des fonctions `spans`."""
+    texts = []
+    pos = start
+    for s, e in spans:
+        texts.append(source[pos:s])
+        pos = e
+    texts.append(source[pos:end])
+    return texts
+
+
+class IncrementalSession:
+    def __init__(self, backend=FluxiaVM, output=None):
+        self.backend = backend
+        self.output = output
+        self.vm: Optional[FluxiaVM] = None
+        self.uses: List[str] = []
+        self.source = ""
+        self.rows = 0
+        # Fonctions dans l'ordre du source : items[:split] en positions,
+        # items[split:] en distances à la fin (voir Item)
+        self.items: List[Item] = []
+        self.split = 0
+        # Nom -> ses définitions, pour retrouver la dernière sans parcourir items
+        self.definitions: Dict[str, List[Item]] = {}
+        self.main_fingerprint: Optional[int] = None
+        # Fonction -> empreinte de la définition chargée dans la VM
+        self.active: Dict[str, int] = {}
+        self.recompiled: List[str] = []
+
+    def update(self, source: str) -> List[str]:
+        """Recompile les éléments modifiés de `source` ; retourne leurs noms."""
+        old, items = self.source, self.items
+        old_length = len(old)
+        old_rows = self.rows
+        shift = len(source) - old_length
+        prefix = common_prefix_length(old, source)
+        suffix = common_suffix_length(old, source, min(old_length, len(source)) - prefix)
+
+        def start_of(item: Item) -> int:
+            return old_length - item.start if item.from_end else item.start
+
+        def end_of(item: Item) -> int:
+            return old_length - item.end if item.from_end else item.end
+
+        def row_of(item: Item) -> int:
+            return old_rows - item.row if item.from_end else item.row
+
+        # Fonctions entièrement dans le préfixe commun, et premières candidates du suffixe
+        head = bisect_right(items, prefix, key=end_of)
+        tail = max(bisect_left(items, old_length - suffix, key=start_of), head)
+        region_start = end_of(items[head - 1]) if head else 0
+
+        spans, tail = self.rescan(source, region_start, items, tail, shift, start_of)
+        region_end_old = start_of(items[tail]) if tail < len(items) else old_length
+        region_end = region_end_old + shift if tail < len(items) else len(source)
+        # Lignes comptées dans la zone seulement
+        if head:
+            region_row = row_of(items[head - 1]) + old.count("\n", start_of(items[head - 1]), region_start)
+        else:
+            region_row = 0
+        row_shift = source.count("\n", region_start, region_end) - old.count("\n", region_start, region_end_old)
+
+        # Éléments de la zone modifiée
+        old_region = items[head:tail]
+        known = {old[start_of(item):end_of(item)]: item for item in old_region}
+        lexed: Dict[Tuple[str, int], List[Token]] = {}
+        region: List[Item] = []
+        row, pos = region_row, region_start
+        for s, e in spans:
+            row += source.count("\n", pos, s)
+            pos = s
+            text = source[s:e]
+            if text in known:
+                name, fp = known[text].name, known[text].fp
+            else:
+                tokens = lex(text, row + 1)
+                tokens.pop()  # EOF
+                name_tok = tokens[1] if len(tokens) > 1 else tokens[0]
+                name = name_tok.value if name_tok.type == "ID" else f"<fn {name_tok.line}:{name_tok.col}>"
+                fp = fingerprint(tokens)
+                lexed[(name, fp)] = tokens
+            region.append(Item(s, e, row, name, fp))
+
+        # Comme Compiler.compile, la dernière définition d'un nom l'emporte :
+        # pour chaque nom touché par la zone, la définition retenue est
+        # cherchée parmi toutes les siennes (une copie hors zone peut survivre)
+        replaced = set(map(id, old_region))
+        last_in_region = {item.name: item for item in region}
+        affected = dict.fromkeys(list(last_in_region) + [item.name for item in old_region])
+        winners: Dict[str, Tuple[int, int, int, int]] = {}
+        for name in affected:
+            item = last_in_region.get(name)
+            best = (item.start, item.end, item.row, item.fp) if item is not None else None
+            for item in self.definitions.get(name, ()):
+                if id(item) not in replaced:
+                    s, e, r = start_of(item), end_of(item), row_of(item)
+                    if s >= region_end_old:
+                        s, e, r = s + shift, e + shift, r + row_shift
+                    if best is None or s > best[0]:
+                        best = (s, e, r, item.fp)
+            if best is not None:
+                winners[name] = best
+        removed = [name for name in affected if name not in winners]
+        changed: Dict[str, Tuple[List[str], List[Tuple]]] = {}
+        for name, (s, e, r, fp) in winners.items():
+            if self.active.get(name) != fp:
+                tokens = lexed.get((name, fp))
+                if tokens is None:
+                    tokens = lex(source[s:e], r + 1)
+                    tokens.pop()  # EOF
+                changed[name] = compile_function_tokens(tokens)
+
+        # Code de premier niveau : recompilé si le texte hors fonctions de la zone a changé
+        uses = self.uses
+        main_fingerprint = self.main_fingerprint
+        old_gaps = gaps(old, region_start, region_end_old, [(start_of(item), end_of(item)) for item in old_region])
+        new_gaps = gaps(source, region_start, region_end, spans)
+        if self.vm is None or old_gaps != new_gaps:
+            all_spans = ([(start_of(item), end_of(item)) for item in items[:head]] + spans
+                         + [(start_of(item) + shift, end_of(item) + shift) for item in items[tail:]])
+            tokens: List[Token] = []
+            for text, line in self.top_level(source, all_spans):
+                tokens.extend(lex(text, line)[:-1])
+            program = Parser(tokens + [Token("EOF", "", 0, 0)]).parse()
+            uses = program.uses
+            main_fingerprint = fingerprint(tokens)
+            if main_fingerprint != self.main_fingerprint or self.vm is None:
+                changed["__main__"] = Compiler().compile(program)[0]["__main__"]
+
+        # Rien n'est appliqué si un élément ne compile pas
+        for name in removed:
+            self.active.pop(name, None)
+        for name in winners:
+            self.active[name] = winners[name][3]
+        # Seules les fonctions entre l'ancienne et la nouvelle zone changent
+        # de représentation : le coût suit le déplacement de l'édition
+        for item in items[self.split:head]:
+            item.flip(old_length, old_rows)
+        for item in items[tail:self.split]:
+            item.flip(old_length, old_rows)
+        items[head:tail] = region
+        self.split = head + len(region)
+        for item in old_region:
+            definitions = self.definitions[item.name]
+            definitions.remove(item)
+            if not definitions:
+                del self.definitions[item.name]
+        for item in region:
+            self.definitions.setdefault(item.name, []).append(item)
+        self.source = source
+        self.rows = old_rows + row_shift
+        self.main_fingerprint = main_fingerprint
+        self.recompiled = list(changed)
+        if self.vm is None or uses != self.uses:
+            # Les builtins dépendent des use : nouvelle VM, mêmes globals
+            previous = self.vm
+            functions = dict(previous.functions) if previous is not None else {}
+            functions.update(changed)
+            for name in removed:
+                functions.pop(name, None)
+            self.vm = self.backend(functions, uses, output=self.output)
+            if previous is not None:
+                self.vm.globals.update(previous.globals)
+        else:
+            self.vm.load_functions(changed, removed)
+        self.uses = uses
+        return self.recompiled
+
+    @staticmethod
+    def rescan(source: str, start: int, items: List[Item], tail: int, shift: int,
+               start_of) -> Tuple[List[Tuple[int, int]], int]:
+        """Découpe les fonctions à partir de `start` jusqu'à retrouver le début
+        d'une fonction inchangée du suffixe (items[tail:], positions données
+        par start_of dans l'ancien source). Retourne les intervalles trouvés
+        et l'indice de la première fonction reprise."""
+        spans: List[Tuple[int, int]] = []
+        depth = 0
+        fn_start = None
+        for m in SCAN_REGEX.finditer(source, start):
+            text = m.group()
+            if text == "{":
+                depth += 1
+            elif text == "}":
+                if depth:
+                    depth -= 1
+                if depth == 0 and fn_start is not None:
+                    spans.append((fn_start, m.end()))
+                    fn_start = None
+            elif text == "fn" and depth == 0 and fn_start is None:
+                pos = m.start()
+                i = bisect_left(items, pos - shift, lo=tail, key=start_of)
+                if i < len(items) and start_of(items[i]) == pos - shift:
+                    # Même état qu'à la version précédente : la suite est identique
+                    return spans, i
+                fn_start = pos
+        if fn_start is not None:
+            spans.append((fn_start, len(source)))
+        return spans, len(items)
+
+    @staticmethod
+    def top_level(source: str, spans: List[Tuple[int, int]]):
+        """Morceaux de code de premier niveau (hors des fonctions `spans`)
+        avec leur numéro de ligne."""
+        pos = 0
+        line = 1
+        for s, e in spans + [(len(source), len(source))]:
+            if s > pos:
+                yield source[pos:s], line
+            line += source.count("\n", pos, e)
+            pos = e
@@ -0,0 +1,124 @@
+# fluxia_intrinsics.py
+"""
+Registre des intrinsèques Fluxia.
+
+Un intrinsèque est un builtin que le compilateur traduit en opcode dédié
+au lieu d'un CALL : `push_stack(p, 1)` devient PUSH_CONST.../PUSH_STACK.
+L'opcode dépile ses `argc` arguments et empile le résultat de `impl`,
+exactement comme l'appel du builtin du même nom.
+
+Ajouter un intrinsèque ne demande qu'un register_intrinsic() avant la
+compilation : le compilateur, la VM et les backends (py, reg) le prennent
+en charge sans autre modification.
+"""
+
+from typing import Any, Callable, Dict
+
+
+class IntrinsicError(Exception):
+    pass
+
+
+class Intrinsic:
+    __slots__ = ("name", "opcode", "argc", "impl")
+
+    def __init__(self, name: str, opcode: str, argc: int, impl: Callable[..., Any]):
+        self.name = name
+        self.opcode = opcode
+        self.argc = argc
+        self.impl = impl
+
+    def __repr__(self):
+        return f"Intrinsic({self.name}, {self.opcode}, {self.argc})"
+
+
+# Nom du builtin -> intrinsèque, et opcode -> intrinsèque
+INTRINSICS: Dict[str, Intrinsic] = {}
+OPCODES: Dict[str, Intrinsic] = {}
+
+
+def register_intrinsic(name: str, opcode: str, argc: int, impl: Callable[..., Any]) -> Intrinsic:
+    if opcode in OPCODES and OPCODES[opcode].name != name:
+        raise IntrinsicError(f"Opcode {opcode} already used by {OPCODES[opcode].name}")
+    intrinsic = Intrinsic(name, opcode, argc, impl)
+    old = INTRINSICS.get(name)
+    if old is not None:
+        del OPCODES[old.opcode]
+    INTRINSICS[name] = intrinsic
+    OPCODES[opcode] = intrinsic
+    return intrinsic
+
+
+# === Structures (Pile, File, ABR, FilePriorite) ===
+# Le module structures n'est importé qu'à la création de la première structure.
+
+def _new_stack():
+    from structures import Pile
+    return Pile()
+
+def _new_queue():
+    from structures import File
+    return File()
+
+def _new_abr():
+    from structures import ABR
+    return ABR()
+
+def _new_pqueue():
+    from structures import FilePriorite
+    return FilePriorite()
+
+def _push_stack(stack, val):
+    return stack.empiler(val)
+
+def _pop_stack(stack):
+    return stack.depiler()
+
+def _enqueue(queue, val):
+    return queue.enfiler(val)
+
+def _dequeue(queue):
+    return queue.defiler()
+
+def _insert_abr(abr, val):
+    return abr.inserer(val)
+
+def _search_abr(abr, val):
+    return abr.rechercher(val)
+
+def _pq_push(pqueue, val, priority):
+    return pqueue.inserer(val, priority)
+
+def _pq_pop(pqueue):
+    return pqueue.extraire_min()
+
+def _pq_decrease(pqueue, val, priority):
+    return pqueue.diminuer_priorite(val, priority)
+
+def _pq_size(pqueue):
+    return pqueue.taille()
+
+# Instantanés : structures persistantes, copie en O(1) (voir structures.py)
+def _snapshot_stack(stack):
+    return stack.copier()
+
+def _snapshot_abr(abr):
+    return abr.copier()
+
+
+register_intrinsic("new_stack", "NEW_STACK", 0, _new_stack)
+register_intrinsic("push_stack", "PUSH_STACK", 2, _push_stack)
+register_intrinsic("pop_stack", "POP_STACK", 1, _pop_stack)
+register_intrinsic("new_queue", "NEW_QUEUE", 0, _new_queue)
+register_intrinsic("enqueue", "ENQUEUE", 2, _enqueue)
+register_intrinsic("dequeue", "DEQUEUE", 1, _dequeue)
+register_intrinsic("new_abr", "NEW_ABR", 0, _new_abr)
+register_intrinsic("insert_abr", "INSERT_ABR", 2, _insert_abr)
+register_intrinsic("search_abr", "SEARCH_ABR", 2, _search_abr)
+register_intrinsic("new_pqueue", "NEW_PQUEUE", 0, _new_pqueue)
+register_intrinsic("pq_push", "PQ_PUSH", 3, _pq_push)
+register_intrinsic("pq_pop", "PQ_POP", 1, _pq_pop)
+register_intrinsic("pq_decrease", "PQ_DECREASE", 3, _pq_decrease)
+register_intrinsic("pq_size", "PQ_SIZE", 1, _pq_size)
+register_intrinsic("snapshot_stack", "SNAPSHOT_STACK", 1, _snapshot_stack)
+register_intrinsic("snapshot_abr", "SNAPSHOT_ABR", 1, _snapshot_abr)
@@ -16,8 +16,12 @@ TOKEN_SPEC = [
     ("MINUS",    r"-"),
     ("MUL",      r"\*"),
     ("DIV",      r"/"),
+    ("MOD",      r"%"),
     ("EQEQ",     r"=="),
     ("NEQ",      r"!="),
+    ("NOT",      r"!"),
+    ("ANDAND",   r"&&"),
+    ("OROR",     r"\|\|"),
     ("GTE",      r">="),
     ("LTE",      r"<="),
     ("GT",       r">"),
@@ -43,6 +47,8 @@ KEYWORDS = {
 }
 
 class Token:
+    __slots__ = ("type", "value", "line", "col")
+
     def __init__(self, type_, value, line, col):
         self.type = type_
         self.value = value
@@ -52,9 +58,10 @@ class Token:
     def __repr__(self):
         return f"Token({self.type}, {self.value}, {self.line}:{self.col})"
 
-def lex(code: str):
+def lex(code: str, line: int = 1):
     tokens = []
-    line = 1
+    # Une seule chaîne par identifiant / mot-clé / nombre distinct
+    values = {}
     col = 1
     for m in re.finditer(TOK_REGEX, code):
         kind = m.lastgroup
@@ -66,6 +73,7 @@ def lex(code: str):
         if kind in ("SKIP", "COMMENT"):
             col += len(value)
             continue
+        value = values.setdefault(value, value)
         if kind == "ID" and value in KEYWORDS:
             kind = KEYWORDS[value]
         tokens.append(Token(kind, value, line, col))
@@ -0,0 +1,275 @@
+# fluxia_metrics.py
+"""
+Profilage par échantillonnage et métriques d'une VM Fluxia en cours d'exécution.
+
+Sampler : un thread lit périodiquement la pile d'appels de la VM et compte
+les piles de fonctions Fluxia observées. collapsed() produit le format
+« piles repliées » (une ligne `main;f;g N` par pile) lu par flamegraph.pl,
+speedscope ou inferno. Le thread de la VM n'est jamais interrompu : le
+sampler se contente de copier VM.call_stack (Frame.name de chaque frame).
+Pour le backend py, qui n'empile pas de Frame, la pile est lue dans les
+frames Python du thread de la VM (fonctions compilées depuis <fluxia-py>).
+
+collect_metrics() rassemble les compteurs de la VM (instructions,
+appels, profondeur d'appel maximale ; absents pour le backend py, qui ne
+compte pas), la taille de la pile d'opérandes (backend vm seulement : py et
+reg n'en ont pas) et la taille des structures
+atteignables depuis les globals, les frames et la pile. to_prometheus()
+et to_json() les formatent ; MetricsServer les sert en HTTP sur
+127.0.0.1 :
+
+    /metrics        format texte Prometheus
+    /metrics.json   JSON
+    /profile        piles repliées du sampler
+"""
+
+import sys
+import json
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.005
+
+# Code Python généré par le backend py (voir PyBackendVM.compile_functions)
+PY_BACKEND_FILENAME = "<fluxia-py>"
+
+
+class MetricsError(Exception):
+    pass
+
+
+class Sampler:
+    """Échantillonne la pile d'appels Fluxia d'une VM toutes les `interval` secondes."""
+
+    def __init__(self, vm, interval: float = DEFAULT_INTERVAL, thread_id: Optional[int] = None):
+        self.vm = vm
+        self.interval = interval
+        # Thread qui exécute la VM : par défaut, celui qui crée le sampler
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples: Counter = Counter()
+        self.total = 0
+        self.max_operand_stack = 0
+        # samples est écrit par le thread du sampler et lu par MetricsServer
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._py_codes: Dict[Any, str] = {}
+
+    def start(self) -> "Sampler":
+        if self._thread is not None:
+            raise MetricsError("Sampler already started")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fluxia-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        stack = self.current_stack()
+        if stack:
+            with self.lock:
+                self.samples[stack] += 1
+                self.total += 1
+        if self.vm.uses_operand_stack:
+            depth = len(self.vm.stack)
+            if depth > self.max_operand_stack:
+                self.max_operand_stack = depth
+
+    def current_stack(self) -> Tuple[str, ...]:
+        if hasattr(self.vm, "py_functions"):
+            return self.python_stack()
+        # Copie atomique : la VM peut empiler ou dépiler pendant la lecture
+        return tuple([frame.name for frame in list(self.vm.call_stack)])
+
+    def python_stack(self) -> Tuple[str, ...]:
+        frame = sys._current_frames().get(self.thread_id)
+        names: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename == PY_BACKEND_FILENAME:
+                name = self._py_codes.get(code)
+                if name is None:
+                    # Fonctions remplacées à chaud : table reconstruite à la demande
+                    self._py_codes = {fn.__code__: n for n, fn in list(self.vm.py_functions.items())}
+                    name = self._py_codes.get(code, code.co_name)
+                names.append(name)
+            frame = frame.f_back
+        names.reverse()
+        return tuple(names)
+
+    def snapshot(self) -> Counter:
+        """Copie des échantillons, lisible pendant l'échantillonnage."""
+        with self.lock:
+            return Counter(self.samples)
+
+    def collapsed(self) -> str:
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.snapshot().most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def write_collapsed(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+
+    def hot_functions(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Fonctions en sommet de pile le plus souvent (temps propre)."""
+        counts: Counter = Counter()
+        for stack, count in self.snapshot().items():
+            counts[stack[-1]] += count
+        return counts.most_common(limit)
+
+
+# --- Métriques ---
+
+def structure_size(obj) -> int:
+    if hasattr(obj, "taille"):
+        return obj.taille()
+    # ABR : nombre de nœuds, parcours itératif
+    size = 0
+    todo = [getattr(obj, "racine", None)]
+    while todo:
+        node = todo.pop()
+        if node is not None:
+            size += 1
+            todo.append(node.gauche)
+            todo.append(node.droite)
+    return size
+
+
+def reachable_structures(vm) -> List[Any]:
+    """Structures (module structures) atteignables depuis les globals,
+    les variables des frames et la pile d'opérandes."""
+    values = list(vm.globals.values()) + list(vm.stack)
+    for frame in list(vm.call_stack):
+        env = frame.env
+        values.extend(env.values() if isinstance(env, dict) else list(env))
+    seen = set()
+    found = []
+    for value in values:
+        if type(value).__module__ == "structures" and id(value) not in seen:
+            seen.add(id(value))
+            found.append(value)
+    return found
+
+
+def collect_metrics(vm, sampler: Optional[Sampler] = None) -> Dict[str, Any]:
+    structures: Dict[str, Dict[str, int]] = {}
+    for obj in reachable_structures(vm):
+        entry = structures.setdefault(type(obj).__name__, {"count": 0, "elements": 0})
+        entry["count"] += 1
+        entry["elements"] += structure_size(obj)
+    metrics = {
+        "timestamp": time.time(),
+        "globals": len(vm.globals),
+        "functions": len(vm.functions),
+        "structures": structures,
+    }
+    if vm.counts_execution:
+        # Le backend py n'a ni compteurs ni frames : pas de faux zéros
+        metrics["instructions"] = vm.instructions
+        metrics["calls"] = vm.calls
+        metrics["call_depth"] = len(vm.call_stack)
+        metrics["max_call_depth"] = vm.max_call_depth
+    if vm.uses_operand_stack:
+        metrics["operand_stack"] = len(vm.stack)
+    if sampler is not None:
+        metrics["samples"] = sampler.total
+        if vm.uses_operand_stack:
+            metrics["max_operand_stack"] = sampler.max_operand_stack
+        metrics["hot_functions"] = dict(sampler.hot_functions())
+    return metrics
+
+
+def to_json(metrics: Dict[str, Any]) -> str:
+    return json.dumps(metrics, indent=2, sort_keys=True)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(metrics: Dict[str, Any]) -> str:
+    lines: List[str] = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP fluxia_{name} {help_text}")
+        lines.append(f"# TYPE fluxia_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"fluxia_{name}{labels} {value}")
+
+    if "instructions" in metrics:
+        metric("instructions_total", "counter", "Instructions executed.", [("", metrics["instructions"])])
+        metric("calls_total", "counter", "Fluxia function calls.", [("", metrics["calls"])])
+        metric("call_depth", "gauge", "Current call depth.", [("", metrics["call_depth"])])
+        metric("max_call_depth", "gauge", "Maximum call depth reached.", [("", metrics["max_call_depth"])])
+    if "operand_stack" in metrics:
+        metric("operand_stack", "gauge", "Current operand stack size.", [("", metrics["operand_stack"])])
+    metric("globals", "gauge", "Global variables.", [("", metrics["globals"])])
+    structures = sorted(metrics["structures"].items())
+    metric("structures", "gauge", "Reachable data structures.",
+           [(f'{{kind="{_label(kind)}"}}', s["count"]) for kind, s in structures])
+    metric("structure_elements", "gauge", "Elements held by reachable data structures.",
+           [(f'{{kind="{_label(kind)}"}}', s["elements"]) for kind, s in structures])
+    if "samples" in metrics:
+        metric("profile_samples_total", "counter", "Profiler samples taken.", [("", metrics["samples"])])
+        if "max_operand_stack" in metrics:
+            metric("max_operand_stack", "gauge", "Largest sampled operand stack.", [("", metrics["max_operand_stack"])])
+        metric("function_samples", "gauge", "Samples with the function on top of the stack.",
+               [(f'{{function="{_label(fn)}"}}', count) for fn, count in metrics["hot_functions"].items()])
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serveur HTTP local (thread démon) exposant métriques et profil."""
+
+    def __init__(self, vm, sampler: Optional[Sampler] = None, host: str = "127.0.0.1", port: int = 0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body, ctype = to_prometheus(collect_metrics(server.vm, server.sampler)), "text/plain; version=0.0.4"
+                elif path == "/metrics.json":
+                    body, ctype = to_json(collect_metrics(server.vm, server.sampler)), "application/json"
+                elif path == "/profile" and server.sampler is not None:
+                    body, ctype = server.sampler.collapsed(), "text/plain"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", f"{ctype}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.vm = vm
+        self.sampler = sampler
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fluxia-metrics", daemon=True)
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
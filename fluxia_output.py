@@ -0,0 +1,116 @@
+# fluxia_output.py
+"""
+Sorties du builtin print de Fluxia.
+
+OutputSink remplace l'appel direct à print() de Python : les lignes sont
+formatées une seule fois, accumulées dans un tampon, puis écrites en bloc.
+Quand le flux cible expose un buffer binaire (sys.stdout.buffer), le tampon
+est gardé en octets et écrit directement dessus, sans repasser par le
+TextIOWrapper ligne par ligne.
+
+CaptureSink garde la sortie en mémoire, pour embarquer la VM dans une
+application hôte ou comparer des exécutions.
+
+Un même sink peut être partagé par plusieurs contextes d'exécution
+(fluxia_pool) : chaque ligne est écrite sous un verrou, jamais entrelacée.
+"""
+
+import sys
+import time
+import _thread
+from typing import Any, List, Optional, Sequence
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+def format_print(args: Sequence[Any]) -> str:
+    """Formate les arguments exactement comme print(*args)."""
+    if len(args) == 1:
+        a = args[0]
+        return (a if type(a) is str else str(a)) + "\n"
+    return " ".join([a if type(a) is str else str(a) for a in args]) + "\n"
+
+
+class OutputSink:
+    """Writer bufferisé utilisé par le builtin print de la VM.
+
+    Le tampon est vidé dès qu'il atteint buffer_size octets, ou lorsqu'une
+    écriture arrive plus de flush_interval secondes après le dernier vidage.
+    buffer_size=0 vide le tampon à chaque print.
+    """
+
+    def __init__(self, stream=None, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 flush_interval: Optional[float] = None):
+        if stream is None:
+            stream = sys.stdout
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        # Chemin binaire : écriture directe dans le buffer sous-jacent
+        self.raw = getattr(stream, "buffer", None)
+        self.encoding = getattr(stream, "encoding", None) or "utf-8"
+        self.errors = getattr(stream, "errors", None) or "strict"
+        self.pending_bytes = bytearray()
+        self.pending_text: List[str] = []
+        self.size = 0
+        self.last_flush = time.monotonic()
+        # _thread plutôt que threading : rien de plus à importer au démarrage
+        self.lock = _thread.allocate_lock()
+
+    def write_print(self, args: Sequence[Any]):
+        line = format_print(args)
+        with self.lock:
+            if self.raw is not None:
+                data = line.encode(self.encoding, self.errors)
+                self.pending_bytes += data
+                self.size += len(data)
+            else:
+                self.pending_text.append(line)
+                self.size += len(line)
+
+            if self.size >= self.buffer_size:
+                self._flush()
+            elif self.flush_interval is not None and time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        self.last_flush = time.monotonic()
+        if not self.size:
+            return
+        if self.raw is not None:
+            # Ce qui a été écrit via la couche texte doit sortir avant nous
+            self.stream.flush()
+            self.raw.write(self.pending_bytes)
+            self.raw.flush()
+            self.pending_bytes = bytearray()
+        else:
+            self.stream.write("".join(self.pending_text))
+            self.stream.flush()
+            self.pending_text = []
+        self.size = 0
+
+
+class CaptureSink(OutputSink):
+    """Capture la sortie de print en mémoire."""
+
+    def __init__(self):
+        # Verrou et état de vidage hérités ; rien n'est écrit sur le flux
+        super().__init__(buffer_size=0)
+        self.lines: List[str] = []
+
+    def write_print(self, args: Sequence[Any]):
+        # list.append est atomique : pas de verrou
+        self.lines.append(format_print(args))
+
+    def flush(self):
+        pass
+
+    def getvalue(self) -> str:
+        return "".join(self.lines)
+
+    def clear(self):
+        self.lines = []
@@ -6,68 +6,82 @@ from fluxia_lexer import Token
 
 # === AST ===
 
-class Node: ...
+# Nœuds sans __dict__ : l'AST d'une grosse source reste compact
+class Node:
+    __slots__ = ()
 
-@dataclass
+@dataclass(slots=True)
 class Program(Node):
     uses: List[str]
     functions: List["FunctionDef"]
     statements: List[Node]
 
-@dataclass
+@dataclass(slots=True)
 class FunctionDef(Node):
     name: str
     params: List[str]
     body: List[Node]
 
-@dataclass
+@dataclass(slots=True)
 class VarDecl(Node):
     name: str
     expr: Node
 
-@dataclass
+@dataclass(slots=True)
 class Assign(Node):
     name: str
     expr: Node
 
-@dataclass
+@dataclass(slots=True)
 class If(Node):
     cond: Node
     then_body: List[Node]
     else_body: List[Node]
 
-@dataclass
+@dataclass(slots=True)
 class While(Node):
     cond: Node
     body: List[Node]
 
-@dataclass
+@dataclass(slots=True)
 class Return(Node):
     expr: Node
 
-@dataclass
+@dataclass(slots=True)
 class Number(Node):
     value: float
 
-@dataclass
+@dataclass(slots=True)
 class String(Node):
     value: str
 
-@dataclass
+@dataclass(slots=True)
 class Bool(Node):
     value: bool
 
-@dataclass
+@dataclass(slots=True)
 class Var(Node):
     name: str
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOp(Node):
     left: Node
     op: str
     right: Node
 
-@dataclass
+@dataclass(slots=True)
+class LogicalOp(Node):
+    # ANDAND / OROR : l'opérande droit n'est évalué que si nécessaire
+    left: Node
+    op: str
+    right: Node
+
+@dataclass(slots=True)
+class UnaryOp(Node):
+    op: str
+    expr: Node
+
+@dataclass(slots=True)
 class Call(Node):
     func: str
     args: List[Node]
@@ -208,85 +222,87 @@ class Parser:
 
     # === Expressions ===
 
-    def parse_expression(self) -> Node:
-        return self.parse_equality()
-
-    def parse_equality(self) -> Node:
-        node = self.parse_comparison()
-        while self.current().type in ("EQEQ", "NEQ"):
-            op_tok = self.current()
-            self.i += 1
-            right = self.parse_comparison()
-            node = BinaryOp(node, op_tok.type, right)
-        return node
-
-    def parse_comparison(self) -> Node:
-        node = self.parse_term()
-        while self.current().type in ("GT", "LT", "GTE", "LTE"):
-            op_tok = self.current()
-            self.i += 1
-            right = self.parse_term()
-            node = BinaryOp(node, op_tok.type, right)
-        return node
-
-    def parse_term(self) -> Node:
-        node = self.parse_factor()
-        while self.current().type in ("PLUS", "MINUS"):
-            op_tok = self.current()
-            self.i += 1
-            right = self.parse_factor()
-            node = BinaryOp(node, op_tok.type, right)
-        return node
-
-    def parse_factor(self) -> Node:
-        node = self.parse_unary()
-        while self.current().type in ("MUL", "DIV"):
-            op_tok = self.current()
-            self.i += 1
-            right = self.parse_unary()
-            node = BinaryOp(node, op_tok.type, right)
-        return node
-
-    def parse_unary(self) -> Node:
-        if self.current().type == "MINUS":
-            self.consume("MINUS")
-            expr = self.parse_unary()
-            return BinaryOp(Number(0.0), "MINUS", expr)
-        return self.parse_primary()
-
-    def parse_primary(self) -> Node:
-        tok = self.current()
-        if tok.type == "NUMBER":
-            self.i += 1
-            return Number(float(tok.value))
-        if tok.type == "STRING":
-            self.i += 1
-            return String(tok.value[1:-1])
-        if tok.type == "TRUE":
-            self.i += 1
-            return Bool(True)
-        if tok.type == "FALSE":
-            self.i += 1
-            return Bool(False)
-        if tok.type == "ID":
-            name = tok.value
+    def parse_expression(self, min_prec: int = 1) -> Node:
+        # Précédence croissante : une chaîne de même niveau est lue en boucle,
+        # on ne descend d'un niveau que pour un opérateur plus prioritaire.
+        tokens = self.tokens
+        tok = tokens[self.i]
+        prefix = PREFIX_PARSERS.get(tok.type)
+        if prefix is None:
+            raise ParserError(f"Unexpected token {tok.type} ({tok.value}) at {tok.line}:{tok.col}")
+        self.i += 1
+        left = prefix(self, tok)
+        while True:
+            op = tokens[self.i].type
+            prec, node = BINARY_OPERATORS.get(op, NOT_BINARY)
+            if prec < min_prec:
+                return left
             self.i += 1
-            if self.current().type == "LPAREN":
-                self.consume("LPAREN")
-                args = []
-                if self.current().type != "RPAREN":
-                    while True:
-                        args.append(self.parse_expression())
-                        if self.current().type == "COMMA":
-                            self.consume("COMMA")
-                        else:
-                            break
-                self.consume("RPAREN")
-                return Call(name, args)
-            return Var(name)
-        if tok.type == "LPAREN":
-            self.consume("LPAREN")
-            expr = self.parse_expression()
-            self.consume("RPAREN")
-            return expr
-        raise ParserError(f"Unexpected token {tok.type} ({tok.value}) at {tok.line}:{tok.col}")
+            right = self.parse_expression(prec + 1)
+            left = node(left, op, right)
+
+    # --- Préfixes : appelés avec le premier token, déjà consommé ---
+
+    def parse_number(self, tok: Token) -> Node:
+        return Number(float(tok.value))
+
+    def parse_string(self, tok: Token) -> Node:
+        return String(tok.value[1:-1])
+
+    def parse_bool(self, tok: Token) -> Node:
+        return Bool(tok.type == "TRUE")
+
+    def parse_name(self, tok: Token) -> Node:
+        if self.current().type != "LPAREN":
+            return Var(tok.value)
+        self.consume("LPAREN")
+        args = []
+        if self.current().type != "RPAREN":
+            while True:
+                args.append(self.parse_expression())
+                if self.current().type == "COMMA":
+                    self.consume("COMMA")
+                else:
+                    break
+        self.consume("RPAREN")
+        return Call(tok.value, args)
+
+    def parse_group(self, tok: Token) -> Node:
+        expr = self.parse_expression()
+        self.consume("RPAREN")
+        return expr
+
+    def parse_negation(self, tok: Token) -> Node:
+        expr = self.parse_expression(UNARY_PRECEDENCE)
+        return BinaryOp(Number(0.0), "MINUS", expr)
+
+    def parse_not(self, tok: Token) -> Node:
+        return UnaryOp("NOT", self.parse_expression(UNARY_PRECEDENCE))
+
+
+# Opérateurs binaires (associatifs à gauche) : token -> (précédence, nœud).
+# Ajouter un opérateur = une entrée ici, dans le lexer et dans OP_MAP du compilateur.
+BINARY_OPERATORS = {
+    "OROR": (1, LogicalOp),
+    "ANDAND": (2, LogicalOp),
+    "EQEQ": (3, BinaryOp), "NEQ": (3, BinaryOp),
+    "GT": (4, BinaryOp), "LT": (4, BinaryOp), "GTE": (4, BinaryOp), "LTE": (4, BinaryOp),
+    "PLUS": (5, BinaryOp), "MINUS": (5, BinaryOp),
+    "MUL": (6, BinaryOp), "DIV": (6, BinaryOp), "MOD": (6, BinaryOp),
+}
+NOT_BINARY = (0, None)
+
+# Les opérateurs préfixes lient plus fort que tout opérateur binaire
+UNARY_PRECEDENCE = 7
+
+# Premier token d'une expression -> méthode de Parser
+PREFIX_PARSERS = {
+    "NUMBER": Parser.parse_number,
+    "STRING": Parser.parse_string,
+    "TRUE": Parser.parse_bool,
+    "FALSE": Parser.parse_bool,
+    "ID": Parser.parse_name,
+    "LPAREN": Parser.parse_group,
+    "MINUS": Parser.parse_negation,
+    "NOT": Parser.parse_not,
+}
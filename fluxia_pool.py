@@ -0,0 +1,202 @@
+# fluxia_pool.py
+"""
+Exécution parallèle de points d'entrée Fluxia.
+
+Une FluxiaVM garde une seule pile, une seule pile d'appels et un seul
+dictionnaire de globals : une instance ne peut pas servir deux appelants à
+la fois. Ce module sépare ce qui se partage de ce qui ne se partage pas :
+
+- CompiledProgram : le bytecode (tuples) et un instantané des globals,
+  figés et partageables entre threads ou envoyés aux processus ;
+- ExecutionContext : une VM privée (pile, frames, globals) créée à partir
+  d'un CompiledProgram ; les globals de départ sont une copie de
+  l'instantané, les écritures restent locales au contexte ;
+- ContextPool : un contexte par worker (thread ou processus) ; submit()
+  et map() répartissent les appels de fonctions Fluxia.
+
+La boucle d'exécution ne prend aucun verrou : chaque contexte n'est utilisé
+que par son thread. Seul le sink de sortie partagé est protégé (une ligne à
+la fois). Avec un Python sans GIL les threads s'exécutent en parallèle ;
+sinon mode="process" répartit le travail sur plusieurs processus.
+"""
+
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fluxia_output import OutputSink
+from fluxia_backends import load_backend
+
+Functions = Dict[str, Tuple[List[str], List[Tuple]]]
+
+# Valeurs immuables : partagées telles quelles entre contextes
+IMMUTABLE_TYPES = (int, float, str, bool, type(None))
+
+
+class PoolError(Exception):
+    pass
+
+
+class CompiledProgram:
+    """Programme compilé immuable : fonctions, use et globals de départ."""
+
+    __slots__ = ("functions", "uses", "globals")
+
+    def __init__(self, functions: Functions, uses: List[str], globals_: Optional[Dict[str, Any]] = None):
+        if getattr(functions, "path", None) is not None:
+            # Bytecode packé projeté en mémoire (fluxia_bytecode) : déjà en lecture seule
+            frozen = functions
+        else:
+            frozen = MappingProxyType({name: (tuple(params), tuple(code)) for name, (params, code) in functions.items()})
+        object.__setattr__(self, "functions", frozen)
+        object.__setattr__(self, "uses", tuple(uses))
+        object.__setattr__(self, "globals", MappingProxyType(dict(globals_ or {})))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledProgram is immutable")
+
+    def __reduce__(self):
+        # Envoi vers un processus worker ; un programme packé n'envoie que
+        # son chemin, chaque worker projette le même fichier
+        path = getattr(self.functions, "path", None)
+        if path is not None:
+            return (CompiledProgram.from_packed, (path, dict(self.globals)))
+        return (CompiledProgram, (dict(self.functions), list(self.uses), dict(self.globals)))
+
+    @classmethod
+    def from_file(cls, path: str, jobs: Optional[int] = None, use_cache: bool = True) -> "CompiledProgram":
+        from fluxia_build import build_project
+        functions, uses = build_project(path, jobs=jobs, use_cache=use_cache)
+        return cls(functions, uses)
+
+    @classmethod
+    def from_packed(cls, path: str, globals_: Optional[Dict[str, Any]] = None) -> "CompiledProgram":
+        from fluxia_bytecode import load_packed
+        functions, uses = load_packed(path)
+        return cls(functions, uses, globals_)
+
+    @classmethod
+    def from_source(cls, source: str) -> "CompiledProgram":
+        from fluxia_build import compile_source
+        functions, uses = compile_source(source)
+        return cls(functions, uses)
+
+    def initialized(self, backend: str = "vm", output: Optional[OutputSink] = None) -> "CompiledProgram":
+        """Exécute le code de premier niveau une fois ; retourne un programme
+        dont les globals de départ sont ceux obtenus."""
+        context = ExecutionContext(self, backend=backend, output=output)
+        if "__main__" in self.functions:
+            context.call("__main__")
+        return CompiledProgram(self.functions, list(self.uses), context.vm.globals)
+
+
+def copy_globals(globals_) -> Dict[str, Any]:
+    """Copie des globals de départ : les structures (Pile, File, ABR...)
+    sont dupliquées pour qu'aucun contexte ne voie les écritures d'un autre."""
+    copied = {}
+    deepcopy = None
+    for name, value in globals_.items():
+        if not isinstance(value, IMMUTABLE_TYPES):
+            if deepcopy is None:
+                from copy import deepcopy
+            value = deepcopy(value)
+        copied[name] = value
+    return copied
+
+
+class ExecutionContext:
+    """VM privée d'un thread ou d'un processus, construite sur un CompiledProgram."""
+
+    def __init__(self, program: CompiledProgram, backend: str = "vm", output: Optional[OutputSink] = None):
+        self.program = program
+        self.vm = load_backend(backend)(program.functions, list(program.uses), output=output)
+        self.vm.globals.update(copy_globals(program.globals))
+
+    def call(self, name: str, *args):
+        vm = self.vm
+        try:
+            return vm.call_function(name, list(args))
+        except BaseException:
+            # Une erreur laisse la pile et les frames de l'appel interrompu
+            vm.stack.clear()
+            vm.call_stack.clear()
+            raise
+        finally:
+            vm.output.flush()
+
+
+# --- Workers processus : un contexte par processus ---
+
+_process_context: Optional[ExecutionContext] = None
+
+
+def _init_process(program: CompiledProgram, backend: str):
+    global _process_context
+    _process_context = ExecutionContext(program, backend=backend)
+
+
+def _call_in_process(name: str, args: Tuple):
+    return _process_context.call(name, *args)
+
+
+class ContextPool:
+    """Répartit des appels de fonctions Fluxia sur des contextes indépendants.
+
+    mode="thread" : un ExecutionContext par thread, sink de sortie partagé ;
+    mode="process" : un ExecutionContext par processus, chacun écrit sur sa
+    propre sortie standard. Les arguments et résultats doivent alors être
+    sérialisables (pickle).
+    """
+
+    def __init__(self, program: CompiledProgram, workers: Optional[int] = None, mode: str = "thread",
+                 backend: str = "vm", output: Optional[OutputSink] = None):
+        if mode not in ("thread", "process"):
+            raise PoolError(f"Unknown pool mode {mode}")
+        self.program = program
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = mode
+        self.backend = backend
+        self.output = output if output is not None else OutputSink()
+        self.contexts: List[ExecutionContext] = []
+        self._local = threading.local()
+        if mode == "thread":
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fluxia")
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process,
+                                                 initargs=(program, backend))
+
+    def context(self) -> ExecutionContext:
+        """Contexte du thread courant, créé à son premier appel."""
+        context = getattr(self._local, "context", None)
+        if context is None:
+            context = ExecutionContext(self.program, backend=self.backend, output=self.output)
+            self._local.context = context
+            self.contexts.append(context)
+        return context
+
+    def _call_in_thread(self, name: str, args: Tuple):
+        return self.context().call(name, *args)
+
+    def submit(self, name: str, *args):
+        """Planifie l'appel name(*args) ; retourne un Future."""
+        if self.mode == "thread":
+            return self._executor.submit(self._call_in_thread, name, args)
+        return self._executor.submit(_call_in_process, name, args)
+
+    def map(self, name: str, calls: Iterable[Tuple]) -> List[Any]:
+        """Appelle name(*args) pour chaque tuple de `calls` ; résultats dans l'ordre."""
+        futures = [self.submit(name, *args) for args in calls]
+        return [f.result() for f in futures]
+
+    def close(self):
+        self._executor.shutdown()
+        self.output.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,427 @@
+# fluxia_pybackend.py
+"""
+Backend Python de Fluxia : compilation anticipée du bytecode en fonctions Python.
+
+Chaque fonction de Compiler.functions (params + liste d'instructions) est
+traduite en source Python puis compilée avec compile(). La pile de la VM est
+simulée symboliquement pendant la traduction : les instructions deviennent
+des expressions Python, les paires JUMP_IF_FALSE / JUMP produites par le
+compilateur redeviennent des if/else et des boucles while.
+
+La sémantique reste celle de FluxiaVM :
+- les paramètres sont des variables locales Python ;
+- toute autre variable vit dans vm.globals (un LOAD_VAR inconnu lève VMError) ;
+- les builtins sont prioritaires sur les fonctions Fluxia ;
+- une fonction inconnue ou un mauvais nombre d'arguments lève VMError à l'appel.
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+from fluxia_vm import FluxiaVM, VMError
+from fluxia_intrinsics import OPCODES
+
+
+class PyBackendError(Exception):
+    pass
+
+
+BINARY_OPS = {
+    "BINARY_ADD": "+",
+    "BINARY_SUB": "-",
+    "BINARY_MUL": "*",
+    "BINARY_DIV": "/",
+    "BINARY_MOD": "%",
+    "BINARY_GT": ">",
+    "BINARY_LT": "<",
+    "BINARY_GTE": ">=",
+    "BINARY_LTE": "<=",
+    "BINARY_EQ": "==",
+    "BINARY_NEQ": "!=",
+}
+
+LOGICAL_OPS = {
+    "JUMP_IF_FALSE_OR_POP": "and",
+    "JUMP_IF_TRUE_OR_POP": "or",
+}
+
+# Au-delà, l'expression est matérialisée dans des temporaires
+# (le parser Python limite l'imbrication des parenthèses).
+MAX_EXPR_DEPTH = 40
+
+
+class FluxiaGlobals(dict):
+    """Globals de la VM : une variable absente lève VMError comme LOAD_VAR."""
+
+    def __missing__(self, name):
+        raise VMError(f"Undefined variable {name}")
+
+
+def _undefined_function(name, *args):
+    raise VMError(f"Undefined function {name}")
+
+
+def _arity_error(name, expected, *args):
+    raise VMError(f"Function {name} expected {expected} args, got {len(args)}")
+
+
+RUNTIME = {
+    "VMError": VMError,
+    "_undefined_function": _undefined_function,
+    "_arity_error": _arity_error,
+}
+
+
+def python_name(prefix: str, name: str) -> str:
+    return prefix + re.sub(r"[^A-Za-z0-9_]", lambda m: f"_x{ord(m.group()):x}_", name)
+
+
+class Entry:
+    """Valeur de la pile simulée : une expression Python."""
+    __slots__ = ("expr", "trivial", "depth")
+
+    def __init__(self, expr: str, trivial: bool = False, depth: int = 0):
+        self.expr = expr
+        # trivial : constante ou temporaire, peut être évaluée à tout moment
+        self.trivial = trivial
+        self.depth = depth
+
+
+class FunctionTranslator:
+    def __init__(self, name: str, params: List[str], code: List[Tuple],
+                 function_names: Dict[str, str], functions: Dict[str, Tuple[List[str], List[Tuple]]],
+                 builtins: Dict[str, Any]):
+        self.name = name
+        self.params = params
+        self.code = code
+        self.function_names = function_names
+        self.functions = functions
+        self.builtins = builtins
+        self.locals = {p: python_name("v_", p) for p in params}
+        self.lines: List[str] = []
+        self.ntemps = 0
+
+        # Tête de boucle -> position du JUMP arrière qui la referme
+        self.loops: Dict[int, int] = {}
+        for j, instr in enumerate(code):
+            if instr[0] == "JUMP" and instr[1] <= j:
+                if instr[1] in self.loops:
+                    raise PyBackendError(f"{name}: unstructured loop at {instr[1]}")
+                self.loops[instr[1]] = j
+
+    # --- Émission ---
+
+    def emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def new_temp(self) -> str:
+        t = f"_t{self.ntemps}"
+        self.ntemps += 1
+        return t
+
+    def spill(self, stack: List[Entry], indent: int):
+        """Évalue dans l'ordre toutes les valeurs en attente sur la pile."""
+        for i, entry in enumerate(stack):
+            if not entry.trivial:
+                t = self.new_temp()
+                self.emit(indent, f"{t} = {entry.expr}")
+                stack[i] = Entry(t, True)
+
+    def materialize(self, entry: Entry, indent: int) -> str:
+        if entry.trivial:
+            return entry.expr
+        t = self.new_temp()
+        self.emit(indent, f"{t} = {entry.expr}")
+        return t
+
+    def pop(self, stack: List[Entry]) -> Entry:
+        if not stack:
+            raise PyBackendError(f"{self.name}: stack underflow")
+        return stack.pop()
+
+    def push(self, stack: List[Entry], entry: Entry, indent: int):
+        stack.append(entry)
+        if entry.depth > MAX_EXPR_DEPTH:
+            self.spill(stack, indent)
+
+    # --- Traduction ---
+
+    def translate(self) -> List[str]:
+        fname = self.function_names[self.name]
+        args = ", ".join(self.locals[p] for p in self.params)
+        self.lines = []
+        self.emit(0, f"def {fname}({args}):")
+        stack: List[Entry] = []
+        self.block(0, len(self.code), stack, 1)
+        if len(self.lines) == 1:
+            self.emit(1, "pass")
+        return self.lines
+
+    def block(self, start: int, end: int, stack: List[Entry], indent: int, entered: int = -1):
+        code = self.code
+        ip = start
+        while ip < end:
+            back = self.loops.get(ip)
+            if back is not None and ip != entered:
+                ip = self.loop(ip, back, stack, indent)
+                continue
+
+            instr = code[ip]
+            op = instr[0]
+
+            if op == "PUSH_CONST":
+                stack.append(Entry(repr(instr[1]), True))
+
+            elif op == "LOAD_VAR":
+                name = instr[1]
+                if name in self.locals:
+                    stack.append(Entry(self.locals[name]))
+                else:
+                    stack.append(Entry(f"_G[{name!r}]"))
+
+            elif op == "STORE_VAR":
+                name = instr[1]
+                value = self.pop(stack)
+                self.spill(stack, indent)
+                if name in self.locals:
+                    self.emit(indent, f"{self.locals[name]} = {value.expr}")
+                else:
+                    self.emit(indent, f"_G[{name!r}] = {value.expr}")
+
+            elif op == "POP":
+                value = self.pop(stack)
+                self.spill(stack, indent)
+                if not value.trivial:
+                    self.emit(indent, value.expr)
+
+            elif op in BINARY_OPS:
+                b = self.pop(stack)
+                a = self.pop(stack)
+                self.push(stack, Entry(f"({a.expr} {BINARY_OPS[op]} {b.expr})",
+                                       depth=max(a.depth, b.depth) + 1), indent)
+
+            elif op == "UNARY_NOT":
+                a = self.pop(stack)
+                self.push(stack, Entry(f"(not {a.expr})", depth=a.depth + 1), indent)
+
+            elif op == "JUMP_IF_FALSE":
+                ip = self.branch(ip, end, stack, indent)
+                continue
+
+            elif op in LOGICAL_OPS:
+                ip = self.short_circuit(ip, end, stack, indent)
+                continue
+
+            elif op == "JUMP":
+                raise PyBackendError(f"{self.name}: unstructured jump at {ip}")
+
+            elif op == "CALL":
+                fname, argc = instr[1], instr[2]
+                args = [self.pop(stack) for _ in range(argc)]
+                args.reverse()
+                depth = max((a.depth for a in args), default=0) + 1
+                self.push(stack, Entry(self.call_expr(fname, [a.expr for a in args]), depth=depth), indent)
+
+            elif op == "RETURN":
+                value = self.pop(stack) if stack else Entry("None", True)
+                self.spill(stack, indent)
+                self.emit(indent, f"return {value.expr}")
+
+            elif op in OPCODES:
+                intrinsic = OPCODES[op]
+                args = [self.pop(stack) for _ in range(intrinsic.argc)]
+                args.reverse()
+                depth = max((a.depth for a in args), default=0) + 1
+                expr = f"{python_name('_i_', intrinsic.name)}({', '.join(a.expr for a in args)})"
+                self.push(stack, Entry(expr, depth=depth), indent)
+
+            else:
+                raise PyBackendError(f"{self.name}: unsupported opcode {op}")
+
+            ip += 1
+
+    def loop(self, head: int, back: int, stack: List[Entry], indent: int) -> int:
+        """Traduit head..back (condition, JUMP_IF_FALSE, corps, JUMP head) en while."""
+        code = self.code
+        exit_jump = None
+        for k in range(head, back):
+            if code[k][0] == "JUMP_IF_FALSE" and code[k][1] == back + 1:
+                exit_jump = k
+                break
+        if exit_jump is None:
+            raise PyBackendError(f"{self.name}: loop at {head} has no exit condition")
+
+        self.spill(stack, indent)
+        depth = len(stack)
+        outer = self.lines
+        self.lines = []
+        self.block(head, exit_jump, stack, indent + 1, entered=head)
+        cond = self.pop(stack)
+        pre = self.lines
+        self.lines = outer
+        if pre:
+            self.emit(indent, "while True:")
+            self.lines.extend(pre)
+            self.emit(indent + 1, f"if not {cond.expr}:")
+            self.emit(indent + 2, "break")
+        else:
+            self.emit(indent, f"while {cond.expr}:")
+
+        mark = len(self.lines)
+        self.block(exit_jump + 1, back, stack, indent + 1)
+        self.spill(stack, indent + 1)
+        if len(stack) != depth:
+            raise PyBackendError(f"{self.name}: loop at {head} leaves values on the stack")
+        if len(self.lines) == mark and not pre:
+            self.emit(indent + 1, "pass")
+        return back + 1
+
+    def short_circuit(self, ip: int, end: int, stack: List[Entry], indent: int) -> int:
+        """Traduit a ; JUMP_IF_*_OR_POP fin ; b ; fin: en `a and b` / `a or b`."""
+        op, target = self.code[ip]
+        if target <= ip or target > end:
+            raise PyBackendError(f"{self.name}: unstructured jump at {ip}")
+        left = self.pop(stack)
+        self.spill(stack, indent)
+        depth = len(stack)
+
+        outer = self.lines
+        self.lines = []
+        self.block(ip + 1, target, stack, indent + 1)
+        right_lines = self.lines
+        self.lines = outer
+        if len(stack) != depth + 1:
+            raise PyBackendError(f"{self.name}: operand at {ip} leaves {len(stack) - depth} values")
+        right = stack.pop()
+
+        if not right_lines:
+            self.push(stack, Entry(f"({left.expr} {LOGICAL_OPS[op]} {right.expr})",
+                                   depth=max(left.depth, right.depth) + 1), indent)
+        else:
+            # L'opérande droit demande des instructions : if explicite
+            t = self.new_temp()
+            self.emit(indent, f"{t} = {left.expr}")
+            self.emit(indent, f"if {t}:" if op == "JUMP_IF_FALSE_OR_POP" else f"if not {t}:")
+            self.lines.extend(right_lines)
+            self.emit(indent + 1, f"{t} = {right.expr}")
+            stack.append(Entry(t, True))
+        return target
+
+    def branch(self, ip: int, end: int, stack: List[Entry], indent: int) -> int:
+        """Traduit JUMP_IF_FALSE else ; then ; JUMP fin ; else en if/else."""
+        code = self.code
+        target = code[ip][1]
+        if target <= ip or target > end:
+            raise PyBackendError(f"{self.name}: unstructured branch at {ip}")
+        then_end = else_start = else_end = target
+        last = code[target - 1]
+        if target - 1 > ip and last[0] == "JUMP" and target <= last[1] <= end:
+            then_end = target - 1
+            else_end = last[1]
+
+        cond = self.pop(stack)
+        self.spill(stack, indent)
+        depth = len(stack)
+
+        self.emit(indent, f"if {cond.expr}:")
+        mark = len(self.lines)
+        self.block(ip + 1, then_end, stack, indent + 1)
+        self.spill(stack, indent + 1)
+        if len(self.lines) == mark:
+            self.emit(indent + 1, "pass")
+        if len(stack) != depth:
+            raise PyBackendError(f"{self.name}: branch at {ip} leaves values on the stack")
+
+        if else_end > else_start:
+            self.emit(indent, "else:")
+            mark = len(self.lines)
+            self.block(else_start, else_end, stack, indent + 1)
+            self.spill(stack, indent + 1)
+            if len(self.lines) == mark:
+                self.emit(indent + 1, "pass")
+            if len(stack) != depth:
+                raise PyBackendError(f"{self.name}: branch at {ip} leaves values on the stack")
+        return else_end
+
+    def call_expr(self, fname: str, args: List[str]) -> str:
+        if fname in self.builtins:
+            return f"_B[{fname!r}]({', '.join(args)})"
+        if fname not in self.functions:
+            return f"_undefined_function({', '.join([repr(fname)] + args)})"
+        expected = len(self.functions[fname][0])
+        if expected != len(args):
+            return f"_arity_error({', '.join([repr(fname), str(expected)] + args)})"
+        return f"{self.function_names[fname]}({', '.join(args)})"
+
+
+def translate_program(functions: Dict[str, Tuple[List[str], List[Tuple]]],
+                      builtins: Dict[str, Any], names: List[str] = None) -> Tuple[str, Dict[str, str]]:
+    """Retourne le source Python des fonctions `names` (toutes par défaut)
+    et le nom Python de chaque fonction."""
+    function_names = {name: python_name("fx_", name) for name in functions}
+    lines: List[str] = []
+    for name in (functions if names is None else names):
+        params, code = functions[name]
+        translator = FunctionTranslator(name, params, code, function_names, functions, builtins)
+        lines.extend(translator.translate())
+        lines.append("")
+    return "\n".join(lines), function_names
+
+
+class PyBackendVM(FluxiaVM):
+    """FluxiaVM dont les fonctions sont exécutées comme du code Python compilé."""
+
+    # Code Python généré : ni compteurs ni frames Fluxia
+    counts_execution = False
+    uses_operand_stack = False
+
+    def __init__(self, functions, uses, output=None):
+        super().__init__(functions, uses, output=output)
+        self.globals = FluxiaGlobals(self.globals)
+        self.namespace = dict(RUNTIME)
+        self.namespace["_G"] = self.globals
+        self.namespace["_B"] = self.builtins
+        for intrinsic in OPCODES.values():
+            self.namespace[python_name("_i_", intrinsic.name)] = intrinsic.impl
+        self.py_functions: Dict[str, Any] = {}
+        self.compile_functions(list(functions))
+
+    def compile_functions(self, names: List[str]):
+        """Traduit et compile `names` dans l'espace de noms partagé.
+
+        Les appels entre fonctions passent par cet espace de noms : remplacer
+        une fonction suffit pour que ses appelants utilisent la nouvelle.
+        """
+        source, function_names = translate_program(self.functions, self.builtins, names)
+        exec(compile(source, "<fluxia-py>", "exec"), self.namespace)
+        for name in names:
+            self.py_functions[name] = self.namespace[function_names[name]]
+
+    def spawn_context(self):
+        context = super().spawn_context()
+        context.namespace["_G"] = context.globals
+        return context
+
+    def load_functions(self, functions, removed=()):
+        # Les appelants vérifient l'arité et l'existence à la traduction :
+        # si elles changent, tout le programme est retraduit.
+        signature_changed = bool(removed) or any(
+            name not in self.functions or len(self.functions[name][0]) != len(fn[0])
+            for name, fn in functions.items()
+        )
+        super().load_functions(functions, removed)
+        for name in removed:
+            self.py_functions.pop(name, None)
+        self.compile_functions(list(self.functions) if signature_changed else list(functions))
+
+    def call_function(self, name: str, args: List[Any]):
+        if name in self.builtins:
+            return self.builtins[name](*args)
+
+        fn = self.py_functions.get(name)
+        if fn is None:
+            raise VMError(f"Undefined function {name}")
+        params = self.functions[name][0]
+        if len(args) != len(params):
+            raise VMError(f"Function {name} expected {len(params)} args, got {len(args)}")
+        return fn(*args)
@@ -0,0 +1,364 @@
+# fluxia_regvm.py
+"""
+Variante à registres de la VM Fluxia.
+
+Le bytecode à pile produit par Compiler est traduit fonction par fonction
+en code à registres. Chaque frame possède un tableau de registres :
+
+    r0 .. rP-1        paramètres
+    rP .. rP+D-1      emplacements de pile (profondeur d -> registre rP+d)
+    rP+D ..           constantes, préchargées à la création de la frame
+
+Les constantes et les paramètres ne sont pas recopiés sur la pile : ils sont
+lus directement dans leur registre, de sorte que `a + 1` devient une seule
+instruction ADD au lieu de LOAD_VAR / PUSH_CONST / BINARY_ADD.
+
+Instructions (tuples, opérandes = indices de registres) :
+
+    MOVE rd, rs                 LOAD_GLOBAL rd, name       STORE_GLOBAL name, rs
+    ADD/SUB/MUL/DIV/MOD rd, ra, rb  GT/LT/GTE/LTE/EQ/NEQ rd, ra, rb
+    JUMP target                 JUMP_IF_FALSE/JUMP_IF_TRUE rs, target
+    NOT rd, rs
+    CALL rd, name, (r1, ...)    RETURN rs
+    INTRINSIC rd, impl, (r1, ...)   (opcodes de fluxia_intrinsics : structures, ...)
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from fluxia_vm import FluxiaVM, Frame, VMError
+from fluxia_intrinsics import OPCODES
+
+
+BINARY_OPS = {
+    "BINARY_ADD": "ADD",
+    "BINARY_SUB": "SUB",
+    "BINARY_MUL": "MUL",
+    "BINARY_DIV": "DIV",
+    "BINARY_MOD": "MOD",
+    "BINARY_GT": "GT",
+    "BINARY_LT": "LT",
+    "BINARY_GTE": "GTE",
+    "BINARY_LTE": "LTE",
+    "BINARY_EQ": "EQ",
+    "BINARY_NEQ": "NEQ",
+}
+
+
+JUMP_OPS = ("JUMP", "JUMP_IF_FALSE", "JUMP_IF_FALSE_OR_POP", "JUMP_IF_TRUE_OR_POP")
+
+
+class RegFunction:
+    def __init__(self, name: str, params: List[str], code: List[Tuple], template: List[Any]):
+        self.name = name
+        self.params = params
+        self.code = code
+        # Registres initiaux après les paramètres : emplacements puis constantes
+        self.template = template
+
+
+class RegisterTranslator:
+    """Traduit le bytecode à pile d'une fonction en code à registres."""
+
+    def __init__(self, name: str, params: List[str], code: List[Tuple]):
+        self.name = name
+        self.params = params
+        self.stack_code = code
+        self.nparams = len(params)
+        self.param_regs = {p: i for i, p in enumerate(params)}
+        self.max_depth = 0
+        self.consts: List[Any] = []
+        self.const_index: Dict[Tuple[type, Any], int] = {}
+        self.code: List[Tuple] = []
+        self.labels = {instr[-1] for instr in code if instr[0] in JUMP_OPS}
+
+    # --- Registres ---
+
+    def slot(self, depth: int) -> int:
+        if depth + 1 > self.max_depth:
+            self.max_depth = depth + 1
+        return self.nparams + depth
+
+    def const(self, value: Any) -> Tuple[str, int]:
+        # Le registre réel n'est connu qu'une fois la profondeur maximale
+        # atteinte : référence symbolique ("const", i), résolue dans finish().
+        key = (type(value), value)
+        if key not in self.const_index:
+            self.const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return ("const", self.const_index[key])
+
+    def materialize(self, stack: List, depth: int):
+        reg = self.slot(depth)
+        if stack[depth] != reg:
+            self.code.append(("MOVE", reg, stack[depth]))
+            stack[depth] = reg
+
+    def flush(self, stack: List):
+        for depth in range(len(stack)):
+            self.materialize(stack, depth)
+
+    # --- Traduction ---
+
+    def translate(self) -> RegFunction:
+        stack: List = []
+        positions: Dict[int, int] = {}
+        label_depth: Dict[int, int] = {}
+        retarget_ok = False
+        code = self.code
+
+        for ip, instr in enumerate(self.stack_code):
+            op = instr[0]
+            if ip in self.labels:
+                if ip in label_depth and len(stack) != label_depth[ip]:
+                    stack = [self.slot(d) for d in range(label_depth[ip])]
+                self.flush(stack)
+                label_depth.setdefault(ip, len(stack))
+                retarget_ok = False
+            positions[ip] = len(code)
+            depth = len(stack)
+
+            if op == "PUSH_CONST":
+                stack.append(self.const(instr[1]))
+                continue
+
+            if op == "LOAD_VAR":
+                name = instr[1]
+                if name in self.param_regs:
+                    stack.append(self.param_regs[name])
+                    continue
+                reg = self.slot(depth)
+                code.append(("LOAD_GLOBAL", reg, name))
+                stack.append(reg)
+
+            elif op == "STORE_VAR":
+                name = instr[1]
+                value = stack.pop()
+                if name in self.param_regs:
+                    target = self.param_regs[name]
+                    # Les lectures en attente du paramètre doivent voir l'ancienne valeur
+                    for d, entry in enumerate(stack):
+                        if entry == target:
+                            self.materialize(stack, d)
+                    last = code[-1] if code else None
+                    if (retarget_ok and value == self.slot(depth - 1) and last is not None
+                            and last[0] in ARITH_OPS and last[1] == value):
+                        code[-1] = (last[0], target) + last[2:]
+                    else:
+                        code.append(("MOVE", target, value))
+                else:
+                    code.append(("STORE_GLOBAL", name, value))
+
+            elif op == "POP":
+                stack.pop()
+
+            elif op in BINARY_OPS:
+                b = stack.pop()
+                a = stack.pop()
+                reg = self.slot(depth - 2)
+                code.append((BINARY_OPS[op], reg, a, b))
+                stack.append(reg)
+
+            elif op == "JUMP_IF_FALSE":
+                cond = stack.pop()
+                self.flush(stack)
+                label_depth.setdefault(instr[1], len(stack))
+                code.append(("JUMP_IF_FALSE", cond, instr[1]))
+
+            elif op == "JUMP":
+                self.flush(stack)
+                label_depth.setdefault(instr[1], len(stack))
+                code.append(("JUMP", instr[1]))
+
+            elif op in ("JUMP_IF_FALSE_OR_POP", "JUMP_IF_TRUE_OR_POP"):
+                # Le sommet est matérialisé dans son emplacement : c'est le
+                # résultat si l'on saute, sinon b y sera calculé à son tour
+                self.flush(stack)
+                label_depth.setdefault(instr[1], len(stack))
+                jump = "JUMP_IF_FALSE" if op == "JUMP_IF_FALSE_OR_POP" else "JUMP_IF_TRUE"
+                code.append((jump, stack.pop(), instr[1]))
+
+            elif op == "UNARY_NOT":
+                value = stack.pop()
+                reg = self.slot(depth - 1)
+                code.append(("NOT", reg, value))
+                stack.append(reg)
+
+            elif op == "CALL":
+                argc = instr[2]
+                args = tuple(stack[len(stack) - argc:]) if argc else ()
+                del stack[len(stack) - argc:]
+                reg = self.slot(len(stack))
+                code.append(("CALL", reg, instr[1], args))
+                stack.append(reg)
+
+            elif op == "RETURN":
+                value = stack.pop() if stack else self.const(None)
+                code.append(("RETURN", value))
+
+            elif op in OPCODES:
+                intrinsic = OPCODES[op]
+                argc = intrinsic.argc
+                args = tuple(stack[len(stack) - argc:]) if argc else ()
+                del stack[len(stack) - argc:]
+                reg = self.slot(len(stack))
+                code.append(("INTRINSIC", reg, intrinsic.impl, args))
+                stack.append(reg)
+
+            else:
+                raise VMError(f"Unknown opcode {op}")
+
+            retarget_ok = True
+
+        positions[len(self.stack_code)] = len(code)
+        code.append(("RETURN", self.const(None)))
+        return self.finish(positions)
+
+    def finish(self, positions: Dict[int, int]) -> RegFunction:
+        """Résout les cibles de saut et les registres de constantes."""
+        const_base = self.nparams + self.max_depth
+
+        def reg(operand):
+            if type(operand) is tuple:
+                return const_base + operand[1]
+            return operand
+
+        code = []
+        for instr in self.code:
+            op = instr[0]
+            if op == "JUMP":
+                code.append(("JUMP", positions[instr[1]]))
+            elif op in ("JUMP_IF_FALSE", "JUMP_IF_TRUE"):
+                code.append((op, reg(instr[1]), positions[instr[2]]))
+            elif op in ("CALL", "INTRINSIC"):
+                code.append((op, instr[1], instr[2], tuple(reg(a) for a in instr[3])))
+            elif op == "LOAD_GLOBAL":
+                code.append(instr)
+            elif op == "STORE_GLOBAL":
+                code.append(("STORE_GLOBAL", instr[1], reg(instr[2])))
+            else:
+                code.append((op,) + tuple(reg(a) for a in instr[1:]))
+        template = [None] * self.max_depth + self.consts
+        return RegFunction(self.name, self.params, code, template)
+
+
+ARITH_OPS = set(BINARY_OPS.values())
+
+
+def translate_functions(functions: Dict[str, Tuple[List[str], List[Tuple]]]) -> Dict[str, RegFunction]:
+    return {name: RegisterTranslator(name, params, code).translate()
+            for name, (params, code) in functions.items()}
+
+
+class RegisterVM(FluxiaVM):
+    """FluxiaVM exécutant le code à registres ; builtins et structures partagés."""
+
+    # Opérandes dans les registres des frames : self.stack reste vide
+    uses_operand_stack = False
+
+    def __init__(self, functions, uses, output=None):
+        super().__init__(functions, uses, output=output)
+        self.reg_functions = translate_functions(functions)
+
+    def load_functions(self, functions, removed=()):
+        super().load_functions(functions, removed)
+        self.reg_functions.update(translate_functions(functions))
+        for name in removed:
+            self.reg_functions.pop(name, None)
+
+    def call_function(self, name: str, args: List[Any]):
+        if name in self.builtins:
+            return self.builtins[name](*args)
+
+        fn = self.reg_functions.get(name)
+        if fn is None:
+            raise VMError(f"Undefined function {name}")
+        if len(args) != len(fn.params):
+            raise VMError(f"Function {name} expected {len(fn.params)} args, got {len(args)}")
+
+        regs = list(args)
+        regs += fn.template
+        frame = Frame(fn.code, regs, 0, name)
+        self.call_stack.append(frame)
+        self.calls += 1
+        if len(self.call_stack) > self.max_call_depth:
+            self.max_call_depth = len(self.call_stack)
+        result = self.exec_registers(fn.code, regs)
+        self.call_stack.pop()
+        return result
+
+    def exec_registers(self, code: List[Tuple], regs: List[Any]):
+        globals_ = self.globals
+        ip = 0
+        executed = 0
+
+        while True:
+            instr = code[ip]
+            ip += 1
+            executed += 1
+            op = instr[0]
+
+            if op == "MOVE":
+                regs[instr[1]] = regs[instr[2]]
+
+            elif op == "LOAD_GLOBAL":
+                try:
+                    regs[instr[1]] = globals_[instr[2]]
+                except KeyError:
+                    raise VMError(f"Undefined variable {instr[2]}") from None
+
+            elif op == "STORE_GLOBAL":
+                globals_[instr[1]] = regs[instr[2]]
+
+            elif op == "ADD":
+                regs[instr[1]] = regs[instr[2]] + regs[instr[3]]
+            elif op == "SUB":
+                regs[instr[1]] = regs[instr[2]] - regs[instr[3]]
+            elif op == "MUL":
+                regs[instr[1]] = regs[instr[2]] * regs[instr[3]]
+            elif op == "DIV":
+                regs[instr[1]] = regs[instr[2]] / regs[instr[3]]
+            elif op == "MOD":
+                regs[instr[1]] = regs[instr[2]] % regs[instr[3]]
+
+            elif op == "LT":
+                regs[instr[1]] = regs[instr[2]] < regs[instr[3]]
+            elif op == "GT":
+                regs[instr[1]] = regs[instr[2]] > regs[instr[3]]
+            elif op == "LTE":
+                regs[instr[1]] = regs[instr[2]] <= regs[instr[3]]
+            elif op == "GTE":
+                regs[instr[1]] = regs[instr[2]] >= regs[instr[3]]
+            elif op == "EQ":
+                regs[instr[1]] = regs[instr[2]] == regs[instr[3]]
+            elif op == "NEQ":
+                regs[instr[1]] = regs[instr[2]] != regs[instr[3]]
+
+            elif op == "JUMP_IF_FALSE":
+                if not regs[instr[1]]:
+                    ip = instr[2]
+            elif op == "JUMP_IF_TRUE":
+                if regs[instr[1]]:
+                    ip = instr[2]
+
+            elif op == "NOT":
+                regs[instr[1]] = not regs[instr[2]]
+
+            elif op == "JUMP":
+                ip = instr[1]
+                self.instructions += executed
+                executed = 0
+
+            elif op == "CALL":
+                self.instructions += executed
+                executed = 0
+                regs[instr[1]] = self.call_function(instr[2], [regs[r] for r in instr[3]])
+
+            elif op == "RETURN":
+                self.instructions += executed
+                return regs[instr[1]]
+
+            elif op == "INTRINSIC":
+                regs[instr[1]] = instr[2](*[regs[r] for r in instr[3]])
+
+            else:
+                raise VMError(f"Unknown opcode {op}")
@@ -1,52 +1,84 @@
-from typing import Any, Dict, List, Tuple, Callable
-from structures import Pile, File, ABR
+from typing import Any, Dict, List, Tuple, Callable, Optional
+from fluxia_output import OutputSink
+from fluxia_intrinsics import INTRINSICS, OPCODES
 
 class VMError(Exception):
     pass
 
 class Frame:
-    def __init__(self, code: List[Tuple], env: Dict[str, Any], ip: int = 0):
+    def __init__(self, code: List[Tuple], env: Dict[str, Any], ip: int = 0, name: str = "?"):
         self.code = code
         self.env = env
         self.ip = ip
+        # Fonction Fluxia exécutée (profilage, traces)
+        self.name = name
+
+GUI_BUILTINS = ("gui_app", "gui_label", "gui_button", "gui_set_text")
 
 class FluxiaVM:
-    def __init__(self, functions: Dict[str, Tuple[List[str], List[Tuple]]], uses: List[str]):
+    # instructions, calls, max_call_depth et call_stack sont tenus à jour
+    counts_execution = True
+    # Les opérandes passent par self.stack (lu par fluxia_metrics)
+    uses_operand_stack = True
+
+    def __init__(self, functions: Dict[str, Tuple[List[str], List[Tuple]]], uses: List[str],
+                 output: Optional[OutputSink] = None):
         self.functions = functions
         self.uses = uses
+        self.output = output if output is not None else OutputSink()
         self.stack: List[Any] = []
         self.globals: Dict[str, Any] = {}
-        self.builtins: Dict[str, Callable] = {}
+        # Les intrinsèques restent appelables comme builtins (CALL dynamique, callbacks)
+        self.builtins: Dict[str, Callable] = {name: i.impl for name, i in INTRINSICS.items()}
         self.call_stack: List[Frame] = []
+        # Compteurs lus par fluxia_metrics (depuis un autre thread au besoin)
+        self.instructions = 0
+        self.calls = 0
+        self.max_call_depth = 0
+        # GuiBridge de fluxia_gui, créé au premier appel d'un builtin gui_*
+        self.gui_bridge = None
         self._setup_builtins()
 
     def _setup_builtins(self):
         self.builtins["print"] = self._builtin_print
-        self.builtins["new_stack"] = lambda: Pile()
-        self.builtins["push_stack"] = lambda stack, val: stack.empiler(val)
-        self.builtins["pop_stack"] = lambda stack: stack.depiler()
-        self.builtins["new_queue"] = lambda: File()
-        self.builtins["enqueue"] = lambda queue, val: queue.enfiler(val)
-        self.builtins["dequeue"] = lambda queue: queue.defiler()
-        self.builtins["new_abr"] = lambda: ABR()
-        self.builtins["insert_abr"] = lambda abr, val: abr.inserer(val)
-        self.builtins["search_abr"] = lambda abr, val: abr.rechercher(val)
         if "gui" in self.uses:
-            try:
-                from fluxia_gui import setup_gui_builtins
-                setup_gui_builtins(self)
-            except ImportError as e:
-                print(e)
+            # PySide6 n'est importé qu'au premier appel d'un builtin GUI
+            for name in GUI_BUILTINS:
+                self.builtins[name] = self._lazy_gui_builtin(name)
+
+    def _lazy_gui_builtin(self, name: str) -> Callable:
+        def load_gui(*args):
+            from fluxia_gui import setup_gui_builtins
+            setup_gui_builtins(self)
+            return self.builtins[name](*args)
+        return load_gui
 
     def _builtin_print(self, *args):
-        print(*args)
+        self.output.write_print(args)
+
+    def load_functions(self, functions: Dict[str, Tuple[List[str], List[Tuple]]], removed: List[str] = ()):
+        """Remplace à chaud des fonctions compilées ; globals et builtins sont conservés."""
+        self.functions.update(functions)
+        for name in removed:
+            self.functions.pop(name, None)
+
+    def spawn_context(self) -> "FluxiaVM":
+        """VM du même backend pour un autre thread : pile et frames propres,
+        fonctions, globals et sortie partagés. Les deux VM ne doivent pas
+        exécuter de code Fluxia en même temps (voir fluxia_gui)."""
+        context = type(self)(self.functions, self.uses, output=self.output)
+        context.globals = self.globals
+        return context
 
     def run(self):
-        if "__main__" in self.functions:
-            self.call_function("__main__", [])
-        if "main" in self.functions:
-            return self.call_function("main", [])
-        return None
+        try:
+            if "__main__" in self.functions:
+                self.call_function("__main__", [])
+            if "main" in self.functions:
+                return self.call_function("main", [])
+            return None
+        finally:
+            self.output.flush()
 
     def call_function(self, name: str, args: List[Any]):
         if name in self.builtins:
@@ -59,8 +91,11 @@ class FluxiaVM:
             raise VMError(f"Function {name} expected {len(params)} args, got {len(args)}")
 
         env = dict(zip(params, args))
-        frame = Frame(code, env)
+        frame = Frame(code, env, 0, name)
         self.call_stack.append(frame)
+        self.calls += 1
+        if len(self.call_stack) > self.max_call_depth:
+            self.max_call_depth = len(self.call_stack)
         result = self.exec_frame()
         self.call_stack.pop()
         return result
@@ -71,10 +106,14 @@ class FluxiaVM:
         env = frame.env
         ip = frame.ip
         stack = self.stack
+        # Compté localement, reporté dans self.instructions aux appels,
+        # aux sauts arrière et à la sortie
+        executed = 0
 
         while ip < len(code):
             instr = code[ip]
             ip += 1
+            executed += 1
             op = instr[0]
 
             if op == "PUSH_CONST":
@@ -114,6 +153,9 @@ class FluxiaVM:
             elif op == "BINARY_DIV":
                 b = stack.pop(); a = stack.pop()
                 stack.append(a / b)
+            elif op == "BINARY_MOD":
+                b = stack.pop(); a = stack.pop()
+                stack.append(a % b)
 
             elif op == "BINARY_GT":
                 b = stack.pop(); a = stack.pop()
@@ -142,6 +184,23 @@ class FluxiaVM:
 
             elif op == "JUMP":
                 ip = instr[1]
+                self.instructions += executed
+                executed = 0
+
+            # && et || : le sommet reste sur la pile s'il décide du résultat
+            elif op == "JUMP_IF_FALSE_OR_POP":
+                if stack[-1]:
+                    stack.pop()
+                else:
+                    ip = instr[1]
+            elif op == "JUMP_IF_TRUE_OR_POP":
+                if stack[-1]:
+                    ip = instr[1]
+                else:
+                    stack.pop()
+
+            elif op == "UNARY_NOT":
+                stack[-1] = not stack[-1]
 
             elif op == "CALL":
                 fname = instr[1]
@@ -149,6 +208,8 @@ class FluxiaVM:
                 args = [stack.pop() for _ in range(argc)]
                 args.reverse()
                 frame.ip = ip
+                self.instructions += executed
+                executed = 0
                 result = self.call_function(fname, args)
                 frame = self.call_stack[-1]
                 code = frame.code
@@ -159,46 +220,22 @@ class FluxiaVM:
             elif op == "RETURN":
                 result = stack.pop() if stack else None
                 frame.ip = ip
+                self.instructions += executed
                 return result
 
-            # Instructions pour les structures
-            elif op == "NEW_STACK":
-                stack.append(Pile())
-            elif op == "PUSH_STACK":
-                val = stack.pop()
-                stack_obj = stack.pop()
-                stack_obj.empiler(val)
-                stack.append(stack_obj)
-            elif op == "POP_STACK":
-                stack_obj = stack.pop()
-                stack.append(stack_obj.depiler())
-                stack.append(stack_obj)
-            elif op == "NEW_QUEUE":
-                stack.append(File())
-            elif op == "ENQUEUE":
-                val = stack.pop()
-                queue_obj = stack.pop()
-                queue_obj.enfiler(val)
-                stack.append(queue_obj)
-            elif op == "DEQUEUE":
-                queue_obj = stack.pop()
-                stack.append(queue_obj.defiler())
-                stack.append(queue_obj)
-            elif op == "NEW_ABR":
-                stack.append(ABR())
-            elif op == "INSERT_ABR":
-                val = stack.pop()
-                abr_obj = stack.pop()
-                abr_obj.inserer(val)
-                stack.append(abr_obj)
-            elif op == "SEARCH_ABR":
-                val = stack.pop()
-                abr_obj = stack.pop()
-                stack.append(abr_obj.rechercher(val))
-                stack.append(abr_obj)
-
             else:
-                raise VMError(f"Unknown opcode {op}")
+                # Intrinsèques (structures, extensions) : argc arguments -> un résultat
+                intrinsic = OPCODES.get(op)
+                if intrinsic is None:
+                    raise VMError(f"Unknown opcode {op}")
+                argc = intrinsic.argc
+                if argc:
+                    args = stack[-argc:]
+                    del stack[-argc:]
+                    stack.append(intrinsic.impl(*args))
+                else:
+                    stack.append(intrinsic.impl())
 
         frame.ip = ip
+        self.instructions += executed
         return None
\ No newline at end of file
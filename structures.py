@@ -1,42 +1,78 @@
 """
-Structures de données classiques en Python : Pile, File, ABR
+Structures de données classiques en Python : Pile, File, ABR, FilePriorite
 """
 
 ## 1. Pile (Stack)
+# Pile persistante : liste chaînée de cellules (element, suivant) immuables.
+# copier() partage les cellules en O(1) ; empiler/depiler sur une copie
+# ne modifient jamais l'autre pile.
+def _pile_depuis(elements):
+    pile = Pile()
+    pile.elements = elements
+    return pile
+
 class Pile:
     def __init__(self):
-        self.elements = []
+        self._tete = None
+        self._taille = 0
+
+    @property
+    def elements(self):
+        # Du fond vers le sommet, comme l'ancienne liste
+        elements = []
+        cellule = self._tete
+        while cellule is not None:
+            elements.append(cellule[0])
+            cellule = cellule[1]
+        elements.reverse()
+        return elements
+
+    @elements.setter
+    def elements(self, elements):
+        tete = None
+        for element in elements:
+            tete = (element, tete)
+        self._tete = tete
+        self._taille = len(elements)
 
     def est_vide(self):
-        return len(self.elements) == 0
+        return self._tete is None
 
     def empiler(self, element):
-        self.elements.append(element)
+        self._tete = (element, self._tete)
+        self._taille += 1
 
     def depiler(self):
-        if self.est_vide():
+        if self._tete is None:
             raise IndexError("Pile vide")
-        return self.elements.pop()
+        element, self._tete = self._tete
+        self._taille -= 1
+        return element
 
     def sommet(self):
-        if self.est_vide():
+        if self._tete is None:
             raise IndexError("Pile vide")
-        return self.elements[-1]
+        return self._tete[0]
 
     def taille(self):
-        return len(self.elements)
+        return self._taille
 
     def afficher(self):
         print("Pile :", self.elements)
 
     def inverser(self):
-        self.elements.reverse()
+        self.elements = self.elements[::-1]
 
     def copier(self):
         nouvelle_pile = Pile()
-        nouvelle_pile.elements = self.elements.copy()
+        nouvelle_pile._tete = self._tete
+        nouvelle_pile._taille = self._taille
         return nouvelle_pile
 
+    def __reduce__(self):
+        # pickle et deepcopy : la chaîne de cellules serait parcourue récursivement
+        return (_pile_depuis, (self.elements,))
+
 ## 2. File (Queue)
 class File:
     def __init__(self):
@@ -91,33 +127,57 @@ class File:
         return element
 
 ## 3. ABR (Arbre Binaire de Recherche)
+# Copie à l'écriture : chaque nœud appartient à l'arbre qui l'a créé
+# (jeton proprietaire). copier() partage tous les nœuds en O(1) et donne un
+# nouveau jeton aux deux arbres ; une modification recopie alors les nœuds
+# partagés du chemin parcouru (O(hauteur)), puis les modifie en place.
 class Noeud:
-    def __init__(self, valeur):
+    __slots__ = ("valeur", "gauche", "droite", "proprietaire")
+
+    def __init__(self, valeur, proprietaire=None):
         self.valeur = valeur
         self.gauche = None
         self.droite = None
+        self.proprietaire = proprietaire
 
 class ABR:
     def __init__(self):
         self.racine = None
+        self._jeton = object()
+
+    def _modifiable(self, noeud):
+        if noeud.proprietaire is self._jeton:
+            return noeud
+        copie = Noeud(noeud.valeur, self._jeton)
+        copie.gauche = noeud.gauche
+        copie.droite = noeud.droite
+        return copie
+
+    def copier(self):
+        nouvel_abr = ABR()
+        nouvel_abr.racine = self.racine
+        self._jeton = object()
+        return nouvel_abr
 
     def inserer(self, valeur):
         if self.racine is None:
-            self.racine = Noeud(valeur)
-        else:
-            self._inserer_recursif(self.racine, valeur)
-
-    def _inserer_recursif(self, noeud, valeur):
-        if valeur < noeud.valeur:
-            if noeud.gauche is None:
-                noeud.gauche = Noeud(valeur)
-            else:
-                self._inserer_recursif(noeud.gauche, valeur)
-        else:
-            if noeud.droite is None:
-                noeud.droite = Noeud(valeur)
+            self.racine = Noeud(valeur, self._jeton)
+            return
+        noeud = self.racine = self._modifiable(self.racine)
+        while True:
+            if valeur < noeud.valeur:
+                if noeud.gauche is None:
+                    noeud.gauche = Noeud(valeur, self._jeton)
+                    return
+                enfant = self._modifiable(noeud.gauche)
+                noeud.gauche = enfant
             else:
-                self._inserer_recursif(noeud.droite, valeur)
+                if noeud.droite is None:
+                    noeud.droite = Noeud(valeur, self._jeton)
+                    return
+                enfant = self._modifiable(noeud.droite)
+                noeud.droite = enfant
+            noeud = enfant
 
     def rechercher(self, valeur):
         return self._rechercher_recursif(self.racine, valeur)
@@ -138,6 +198,7 @@ class ABR:
     def _supprimer_recursif(self, noeud, valeur):
         if noeud is None:
             return noeud
+        noeud = self._modifiable(noeud)
         if valeur < noeud.valeur:
             noeud.gauche = self._supprimer_recursif(noeud.gauche, valeur)
         elif valeur > noeud.valeur:
@@ -200,6 +261,110 @@ class ABR:
     def afficher(self):
         print("Parcours infixe :", self.parcours_infixe())
 
+## 4. FilePriorite (tas binaire)
+# Tas min : chaque entrée est [priorite, ordre, element, indice] ; ordre
+# départage les priorités égales (premier inséré, premier sorti), indice est
+# la place de l'entrée dans le tas. Chaque insertion ajoute une entrée, même
+# si l'élément est déjà présent (Dijkstra paresseux, ordonnancement).
+# entrees associe chaque élément à ses entrées, pour diminuer_priorite en
+# O(log n) ; elle n'est possible que pour un élément présent une seule fois.
+class FilePriorite:
+    def __init__(self):
+        self.tas = []
+        self.entrees = {}
+        self._ordre = 0
+
+    def est_vide(self):
+        return len(self.tas) == 0
+
+    def taille(self):
+        return len(self.tas)
+
+    def inserer(self, element, priorite):
+        entree = [priorite, self._ordre, element, len(self.tas)]
+        self.entrees.setdefault(element, {})[self._ordre] = entree
+        self._ordre += 1
+        self.tas.append(entree)
+        self._remonter(entree[3])
+
+    def extraire_min(self):
+        if not self.tas:
+            raise IndexError("File de priorité vide")
+        dernier = self.tas.pop()
+        minimum = dernier
+        if self.tas:
+            minimum = self.tas[0]
+            self.tas[0] = dernier
+            dernier[3] = 0
+            self._descendre(0)
+        entrees = self.entrees[minimum[2]]
+        del entrees[minimum[1]]
+        if not entrees:
+            del self.entrees[minimum[2]]
+        return minimum[2]
+
+    def minimum(self):
+        if not self.tas:
+            raise IndexError("File de priorité vide")
+        return self.tas[0][2]
+
+    def priorite(self, element):
+        return self._entree_unique(element)[0]
+
+    def diminuer_priorite(self, element, priorite):
+        entree = self._entree_unique(element)
+        if priorite > entree[0]:
+            raise ValueError("La nouvelle priorité doit être inférieure ou égale")
+        entree[0] = priorite
+        self._remonter(entree[3])
+
+    def _entree_unique(self, element):
+        entrees = self.entrees.get(element)
+        if not entrees:
+            raise KeyError(f"Élément absent de la file de priorité : {element}")
+        if len(entrees) > 1:
+            raise ValueError(f"Élément présent plusieurs fois dans la file de priorité : {element}")
+        return next(iter(entrees.values()))
+
+    def _remonter(self, i):
+        tas = self.tas
+        entree = tas[i]
+        cle = (entree[0], entree[1])
+        while i > 0:
+            parent = (i - 1) >> 1
+            p = tas[parent]
+            if (p[0], p[1]) <= cle:
+                break
+            tas[i] = p
+            p[3] = i
+            i = parent
+        tas[i] = entree
+        entree[3] = i
+
+    def _descendre(self, i):
+        tas = self.tas
+        n = len(tas)
+        entree = tas[i]
+        cle = (entree[0], entree[1])
+        while True:
+            enfant = 2 * i + 1
+            if enfant >= n:
+                break
+            droite = enfant + 1
+            if droite < n and (tas[droite][0], tas[droite][1]) < (tas[enfant][0], tas[enfant][1]):
+                enfant = droite
+            e = tas[enfant]
+            if cle <= (e[0], e[1]):
+                break
+            tas[i] = e
+            e[3] = i
+            i = enfant
+        tas[i] = entree
+        entree[3] = i
+
+    def afficher(self):
+        print("File de priorité :", [(e[2], e[0]) for e in sorted(self.tas)])
+
 # Exemple d'utilisation
 if __name__ == "__main__":
     print("=== Pile ===")
@@ -224,4 +389,11 @@ if __name__ == "__main__":
     abr.afficher()  # Affiche [3, 5, 7]
     abr.supprimer(3)
     abr.afficher()  # Affiche [5, 7]
-    print("Hauteur :", abr.hauteur())  # Affiche 2
\ No newline at end of file
+    print("Hauteur :", abr.hauteur())  # Affiche 2
+
+    print("\n=== FilePriorite ===")
+    fp = FilePriorite()
+    fp.inserer("b", 2)
+    fp.inserer("a", 5)
+    fp.diminuer_priorite("a", 1)
+    print("Minimum :", fp.extraire_min())  # Affiche a
\ No newline at end of file
@@ -0,0 +1,142 @@
+# tests/test_gui.py
+"""Bouton cliqué sans affichage (plateforme offscreen de Qt) : callbacks sur
+le worker, mises à jour des widgets appliquées par lots."""
+
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+from PySide6 import QtCore
+
+from fluxia_lexer import lex
+from fluxia_parser import Parser
+from fluxia_compiler import Compiler
+from fluxia_output import CaptureSink
+from fluxia_backends import BACKENDS, load_backend
+from fluxia_gui import WidgetHandle, build_window
+
+SOURCE = """
+use gui;
+
+fn build_ui(win) {
+    fenetre = win;
+    status = gui_label(win, "0 clic");
+    gui_button(win, "Plus", "on_click");
+    gui_button(win, "Lent", "slow");
+    gui_button(win, "Long", "long_task");
+}
+
+fn on_click() {
+    clics = clics + 1;
+    gui_set_text(status, clics);
+    extra = gui_label(fenetre, "clic");
+    gui_set_text(extra, clics);
+}
+
+fn slow() {
+    let i = 0;
+    while (i < 200000) {
+        i = i + 1;
+    }
+    lent = lent + 1;
+}
+
+fn long_task() {
+    gui_set_text(status, "working...");
+    while (!fini) {
+    }
+    gui_set_text(status, "done");
+}
+
+clics = 0;
+lent = 0;
+fini = false;
+"""
+
+
+def make_window(backend: str):
+    functions, uses = Compiler().compile(Parser(lex(SOURCE)).parse())
+    vm = load_backend(backend)(functions, uses, output=CaptureSink())
+    vm.run()
+    app, main, bridge = build_window(vm, "Test", "build_ui")
+    buttons = {b.text(): b for b in main.findChildren(QtWidgets.QPushButton)}
+    return vm, main, bridge, buttons
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_click_applies_batched_updates(backend):
+    vm, main, bridge, buttons = make_window(backend)
+    try:
+        status = vm.globals["status"]
+        buttons["Plus"].click()
+        bridge.callbacks.join()
+        # Callback terminé sur le worker, lot pas encore appliqué par l'interface
+        assert vm.globals["clics"] == 1
+        assert status.text() == "0 clic"
+        assert vm.globals["extra"].widget is None
+
+        bridge.wait_idle()
+        assert status.text() == "1.0"
+        extra = vm.globals["extra"]
+        assert isinstance(extra, WidgetHandle)
+        assert isinstance(extra.widget, QtWidgets.QLabel)
+        assert extra.widget.text() == "1.0"
+        assert extra.widget.parent() is main
+
+        buttons["Plus"].click()
+        bridge.wait_idle()
+        assert status.text() == "2.0"
+        assert len(main.findChildren(QtWidgets.QLabel)) == 3
+    finally:
+        bridge.stop()
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_clicks_coalesce_while_callback_waits(backend):
+    vm, main, bridge, buttons = make_window(backend)
+    try:
+        assert bridge.click("slow")
+        # on_click attend la fin de slow : les clics suivants sont ignorés
+        assert bridge.click("on_click")
+        for _ in range(5):
+            buttons["Plus"].click()
+        bridge.wait_idle()
+        assert vm.globals["lent"] == 1
+        assert vm.globals["clics"] == 1
+        assert vm.globals["status"].text() == "1.0"
+    finally:
+        bridge.stop()
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_long_callback_flushes_while_running(backend):
+    vm, main, bridge, buttons = make_window(backend)
+    try:
+        status = vm.globals["status"]
+        buttons["Long"].click()
+        # long_task tourne jusqu'à ce que fini passe à true
+        deadline = time.monotonic() + 5
+        while status.text() != "working..." and time.monotonic() < deadline:
+            QtCore.QCoreApplication.processEvents()
+            time.sleep(0.01)
+        assert status.text() == "working..."
+        assert bridge.callbacks.unfinished_tasks == 1
+
+        vm.globals["fini"] = True
+        bridge.wait_idle()
+        assert status.text() == "done"
+    finally:
+        vm.globals["fini"] = True
+        bridge.stop()
+
+
+def test_stop_waits_for_running_callback():
+    vm, main, bridge, buttons = make_window("vm")
+    buttons["Lent"].click()
+    bridge.stop()
+    assert vm.globals["lent"] == 1
+    assert not bridge.callbacks.unfinished_tasks